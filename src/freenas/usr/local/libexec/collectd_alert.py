@@ -25,55 +25,86 @@
 # SUCH DAMAGE.
 #
 
-import contextlib
-import json
+import fcntl
 import os
-import re
 import sys
 
-from lockfile import LockFile, LockTimeout
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
 from middlewared.utils import MIDDLEWARE_RUN_DIR
 
 
 COLLECTD_FILE = os.path.join(MIDDLEWARE_RUN_DIR, '.collectdalert')
+LOCK_FILE = COLLECTD_FILE + '.lock'
 
 
 def main():
 
-    lock = LockFile(COLLECTD_FILE)
-    while not lock.i_am_locking():
-        try:
-            lock.acquire(timeout=5)
-        except LockTimeout:
-            lock.break_lock()
+    # Lock a stable sidecar path: the state file itself is swapped out by
+    # os.replace, so a lock on its inode would not serialize writers.
+    lock_fd = os.open(LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
 
     data = {}
-    with contextlib.suppress(FileNotFoundError):
-        with open(COLLECTD_FILE, 'r') as f:
+    try:
+        fd = os.open(COLLECTD_FILE, os.O_RDONLY)
+    except FileNotFoundError:
+        pass
+    else:
+        size = os.fstat(fd).st_size
+        if size > 0:
             try:
-                data = json.loads(f.read())
+                data = _json.loads(os.read(fd, size))
             except Exception:
                 pass
+        os.close(fd)
 
-    text = sys.stdin.read().replace('\n\n', '\nMessage: ', 1)
-    v = dict(re.findall(r"(?P<name>.*?): (?P<value>.*?)\n", text))
+    header, sep, body = sys.stdin.read().partition('\n\n')
+    plugin = plugin_inst = type_ = type_inst = severity = None
+    for line in header.split('\n'):
+        name, _, value = line.partition(': ')
+        if name == 'Plugin':
+            plugin = value
+        elif name == 'PluginInstance':
+            plugin_inst = value
+        elif name == 'Type':
+            type_ = value
+        elif name == 'TypeInstance':
+            type_inst = value
+        elif name == 'Severity':
+            severity = value
 
-    k = v["Plugin"]
-    if "PluginInstance" in list(v.keys()):
-        k += "-" + v["PluginInstance"]
-    k += "/" + v["Type"]
-    if "TypeInstance" in list(v.keys()):
-        k += "-" + v["TypeInstance"]
+    plugin_key = plugin + (f'-{plugin_inst}' if plugin_inst else '')
+    type_key = type_ + (f'-{type_inst}' if type_inst else '')
+    k = f'{plugin_key}/{type_key}'
 
-    if v["Severity"] == "OKAY":
-        data.pop(k, None)
+    if severity == 'OKAY':
+        changed = data.pop(k, None) is not None
     else:
+        v = {'Plugin': plugin, 'Type': type_, 'Severity': severity}
+        if plugin_inst:
+            v['PluginInstance'] = plugin_inst
+        if type_inst:
+            v['TypeInstance'] = type_inst
+        if sep:
+            v['Message'] = body.rstrip('\n')
+        changed = data.get(k) != v
         data[k] = v
 
-    with open(COLLECTD_FILE, 'w') as f:
-        f.write(json.dumps(data))
+    if changed:
+        dumped = _json.dumps(data)
+        if isinstance(dumped, str):
+            dumped = dumped.encode()
+        tmp = COLLECTD_FILE + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(dumped)
+        os.replace(tmp, COLLECTD_FILE)
 
-    lock.release()
+    fcntl.flock(lock_fd, fcntl.LOCK_UN)
+    os.close(lock_fd)
 
 
 if __name__ == '__main__':
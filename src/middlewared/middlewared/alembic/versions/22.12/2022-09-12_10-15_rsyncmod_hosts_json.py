@@ -0,0 +1,36 @@
+"""Store rsync module hosts lists as JSON
+
+Revision ID: b41f29c1a38d
+Revises: aef1177c39c5
+Create Date: 2022-09-12 10:15:21.184306+00:00
+
+"""
+import json
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41f29c1a38d'
+down_revision = 'aef1177c39c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+
+    for row in map(dict, conn.execute(
+        "SELECT id, rsyncmod_hostsallow, rsyncmod_hostsdeny FROM services_rsyncmod"
+    ).fetchall()):
+        conn.execute(
+            "UPDATE services_rsyncmod SET rsyncmod_hostsallow = ?, rsyncmod_hostsdeny = ? WHERE id = ?", (
+                json.dumps((row['rsyncmod_hostsallow'] or '').split()),
+                json.dumps((row['rsyncmod_hostsdeny'] or '').split()),
+                row['id'],
+            )
+        )
+
+
+def downgrade():
+    pass
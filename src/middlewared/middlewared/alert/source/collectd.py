@@ -1,4 +1,3 @@
-from lockfile import LockFile, LockTimeout
 import json
 import os
 
@@ -31,25 +30,17 @@ class CollectdCriticalAlertClass(AlertClass):
 
 class CollectdAlertSource(ThreadedAlertSource):
     def check_sync(self):
-        if not os.path.exists(COLLECTD_FILE):
+        # collectd_alert.py replaces the state file atomically, so a plain
+        # read always observes a consistent snapshot and no lock is needed
+        try:
+            with open(COLLECTD_FILE, "r") as f:
+                try:
+                    data = json.loads(f.read())
+                except Exception:
+                    data = {}
+        except FileNotFoundError:
             return
 
-        lock = LockFile(COLLECTD_FILE)
-
-        while not lock.i_am_locking():
-            try:
-                lock.acquire(timeout=5)
-            except LockTimeout:
-                return
-
-        with open(COLLECTD_FILE, "r") as f:
-            try:
-                data = json.loads(f.read())
-            except Exception:
-                data = {}
-
-        lock.release()
-
         alerts = []
         for k, v in list(data.items()):
             if k == "ctl-ha/disk_octets":
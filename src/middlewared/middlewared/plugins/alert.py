@@ -849,6 +849,35 @@ class AlertService(Service):
     @accepts(Str("klass"), Any("query", null=True, default=None))
     @job(lock="process_alerts", transient=True)
     async def oneshot_delete(self, job, klass, query):
+        if await self.__oneshot_delete(klass, query):
+            # We need to flush alerts to the database immediately after deleting oneshot alerts.
+            # Some oneshot alerts can only de deleted programmatically (i.e. cloud sync oneshot alerts are deleted
+            # when deleting cloud sync task). If we delete a cloud sync task and then reboot the system abruptly,
+            # the alerts won't be flushed to the database and on next boot an alert for nonexisting cloud sync task
+            # will appear, and it won't be deletable.
+            await self.middleware.call("alert.flush_alerts")
+
+            await self.middleware.call("alert.send_alerts")
+
+    @private
+    @accepts(List("alerts"))
+    @job(lock="process_alerts", transient=True)
+    async def oneshot_delete_many(self, job, alerts):
+        """
+        Delete several one-shot alerts ((klass, query) pairs) under a single
+        job and lock acquisition, flushing to the database once.
+        """
+        deleted = False
+        for klass, query in alerts:
+            deleted |= await self.__oneshot_delete(klass, query)
+
+        if deleted:
+            # see the flush rationale in `oneshot_delete`
+            await self.middleware.call("alert.flush_alerts")
+
+            await self.middleware.call("alert.send_alerts")
+
+    async def __oneshot_delete(self, klass, query):
         try:
             klass = AlertClass.class_by_name[klass]
         except KeyError:
@@ -866,15 +895,7 @@ class AlertService(Service):
                 self.alerts.remove(deleted_alert)
                 deleted = True
 
-        if deleted:
-            # We need to flush alerts to the database immediately after deleting oneshot alerts.
-            # Some oneshot alerts can only de deleted programmatically (i.e. cloud sync oneshot alerts are deleted
-            # when deleting cloud sync task). If we delete a cloud sync task and then reboot the system abruptly,
-            # the alerts won't be flushed to the database and on next boot an alert for nonexisting cloud sync task
-            # will appear, and it won't be deletable.
-            await self.middleware.call("alert.flush_alerts")
-
-            await self.middleware.call("alert.send_alerts")
+        return deleted
 
     @private
     def alert_source_clear_run(self, name):
@@ -474,6 +474,14 @@ class EtcService(Service):
                 if not changes:
                     self.logger.debug(f'No new changes for {outfile}')
 
+    async def generate_many(self, names, checkpoint=None):
+        """
+        Generate several groups with a single middleware call, preserving
+        the given order.
+        """
+        for name in names:
+            await self.generate(name, checkpoint)
+
     async def generate_checkpoint(self, checkpoint):
         if checkpoint not in await self.get_checkpoints():
             raise CallError(f'"{checkpoint}" not recognised')
@@ -1,15 +1,19 @@
 import asyncio
-import base64
+import concurrent.futures
 import errno
 import logging
 import os
+import random
 import re
 import shutil
 import socket
+import struct
 import textwrap
+import threading
 import time
 from functools import partial
 
+from middlewared.job import State
 from middlewared.plugins.failover_.journal import SQL_QUEUE
 from middlewared.plugins.failover_.utils import throttle_condition
 from middlewared.schema import accepts, Bool, Dict, Int, List, NOT_PROVIDED, Str, returns, Patch
@@ -25,6 +29,54 @@ from middlewared.plugins.failover_.zpool_cachefile import ZPOOL_CACHE_FILE, ZPOO
 
 ENCRYPTION_CACHE_LOCK = asyncio.Lock()
 
+# In-flight failover status recomputation, keyed by cache key. Concurrent
+# callers that miss the cache await the probe that is already running
+# instead of each issuing their own remote RPC.
+_STATUS_INFLIGHT = {}
+
+# decorrelated-jitter backoff for the standby polling loops: retry quickly
+# at first so fast reboots are detected in under a second, then back off so
+# tail polls (and fleets of HA pairs booting together) don't hammer the peer
+_BACKOFF_BASE = 0.5
+
+# leading dotted-numeric token of a boot environment id (e.g. '22.02.4')
+_VERSION_RE = re.compile(r'(\d+(?:\.\d+)*)')
+
+
+def _bootenv_version(be_id):
+    match = _VERSION_RE.search(be_id)
+    if match is None:
+        return ()
+    # integer components compare correctly where floats would not
+    # (11.10 is newer than 11.2)
+    return tuple(int(part) for part in match.group(1).split('.'))
+
+
+def _backoff_delay(prev, cap, remaining):
+    return max(0, min(cap, remaining, random.uniform(_BACKOFF_BASE, prev * 3)))
+
+
+# interlink peer addresses as packed 32-bit ints; ha_permission runs on
+# every incoming connection, so the admission check is a single integer
+# set probe instead of string comparisons
+_HA_PEER_INTS = frozenset(
+    struct.unpack('!I', socket.inet_aton(ip))[0] for ip in ('169.254.10.1', '169.254.10.2')
+)
+
+# services whose actions are never propagated to the standby node
+_BLACKLISTED_SERVICES = frozenset({'system', 'webshell', 'smartd', 'nfs'})
+
+# errnos that indicate the peer is (re)booting rather than broken
+_TRANSIENT_CONN_ERRNOS = frozenset({errno.ECONNREFUSED, errno.ECONNRESET})
+
+# (node, make node the master?) -> master_node database value
+_MASTER_TABLE = {
+    ('A', True): 'A',
+    ('A', False): 'B',
+    ('B', True): 'B',
+    ('B', False): 'A',
+}
+
 logger = logging.getLogger('failover')
 
 
@@ -45,8 +97,12 @@ class FailoverService(ConfigService):
 
     HA_MODE = None
     HA_LICENSED = None
+    HA_LICENSED_LOCK = threading.Lock()
+    NODE = None
     LAST_STATUS = None
     LAST_DISABLEDREASONS = None
+    STATE_CACHE = None
+    STATE_CACHE_TS = 0.0
 
     class Config:
         datastore = 'system.failover'
@@ -118,21 +174,15 @@ class FailoverService(ConfigService):
             else:
                 await self.middleware.call('failover.call_remote', 'failover.force_master')
 
+        await self.middleware.call('failover.status_refresh')
+
         return await self.config()
 
     async def _master_node(self, master):
         node = await self.middleware.call('failover.node')
-        if node == 'A':
-            if master:
-                return 'A'
-            else:
-                return 'B'
-        elif node == 'B':
-            if master:
-                return 'B'
-            else:
-                return 'A'
-        else:
+        try:
+            return _MASTER_TABLE[(node, bool(master))]
+        except KeyError:
             raise CallError('Unable to change node state in MANUAL mode')
 
     @accepts()
@@ -142,13 +192,17 @@ class FailoverService(ConfigService):
         Checks whether this instance is licensed as a HA unit.
         """
         # update the class attribute so that all instances
-        # of this class see the correct value
+        # of this class see the correct value; the lock prevents concurrent
+        # callers from racing duplicate system.license lookups (the
+        # license-update hook resets the attribute to None to invalidate)
         if FailoverService.HA_LICENSED is None:
-            info = self.middleware.call_sync('system.license')
-            if info is not None and info['system_serial_ha']:
-                FailoverService.HA_LICENSED = True
-            else:
-                FailoverService.HA_LICENSED = False
+            with FailoverService.HA_LICENSED_LOCK:
+                if FailoverService.HA_LICENSED is None:
+                    info = self.middleware.call_sync('system.license')
+                    if info is not None and info['system_serial_ha']:
+                        FailoverService.HA_LICENSED = True
+                    else:
+                        FailoverService.HA_LICENSED = False
 
         return FailoverService.HA_LICENSED
 
@@ -174,7 +228,7 @@ class FailoverService(ConfigService):
           BHYVE
           MANUAL
         """
-        return (await self.middleware.call('failover.ha_mode'))[0]
+        return (await self.ha_mode())[0]
 
     @accepts()
     @returns(Str())
@@ -186,7 +240,12 @@ class FailoverService(ConfigService):
           B - Seconde Node
           MANUAL - slot position in chassis could not be determined
         """
-        return (await self.middleware.call('failover.ha_mode'))[1]
+        # update the class attribute so that all instances
+        # of this class see the correct value
+        if FailoverService.NODE is None:
+            FailoverService.NODE = (await self.ha_mode())[1]
+
+        return FailoverService.NODE
 
     @private
     @accepts()
@@ -223,13 +282,38 @@ class FailoverService(ConfigService):
 
     async def _status(self, app):
         try:
-            status = await self.middleware.call('cache.get', 'failover_status')
+            return await self.middleware.call('cache.get', 'failover_status')
         except KeyError:
-            status = await self.middleware.call('failover.status.get_local', app)
-            if status:
-                await self.middleware.call('cache.put', 'failover_status', status, 300)
+            pass
 
+        inflight = _STATUS_INFLIGHT.get('failover_status')
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        fut = _STATUS_INFLIGHT['failover_status'] = asyncio.get_event_loop().create_future()
+        try:
+            status = await self._status_impl(app)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # we re-raise below; don't warn if no one else is waiting
+            raise
+        else:
+            fut.set_result(status)
+            return status
+        finally:
+            del _STATUS_INFLIGHT['failover_status']
+
+    async def _status_impl(self, app):
+        status = await self.middleware.call('failover.status.get_local', app)
         if status:
+            # No TTL here: every failover state transition (force_master,
+            # vrrp master/backup events, remote connect/disconnect) goes
+            # through failover.status_refresh which pops this key, so an
+            # expiry would only cause periodic recomputation stampedes.
+            await self.middleware.call('cache.put', 'failover_status', status)
             return status
 
         try:
@@ -238,8 +322,15 @@ class FailoverService(ConfigService):
             # connection is "up" but the default TCP window hasn't elapsed so
             # the connection remains alive. Without the timeout, this could take
             # 20+ seconds to return which is unacceptable during a failover event.
-            remote_imported = await self.middleware.call(
-                'failover.call_remote', 'zfs.pool.query_imported_fast', [], {'timeout': 5}
+            # the RPC timeout only bounds the call once it is on the wire; a
+            # wedged websocket (e.g. standby hard-rebooted before the TCP
+            # window expired) can still stall the caller, so wrap the whole
+            # thing with a hard ceiling of twice the RPC timeout
+            remote_imported = await asyncio.wait_for(
+                self.middleware.call(
+                    'failover.call_remote', 'zfs.pool.query_imported_fast', [], {'timeout': 5}
+                ),
+                timeout=10,
             )
             if len(remote_imported) <= 1:
                 # getting here means we dont have a pool and neither does remote node
@@ -247,14 +338,33 @@ class FailoverService(ConfigService):
             else:
                 # Other node has the pool (excluding boot pool)
                 return 'BACKUP'
+        except asyncio.TimeoutError:
+            self.logger.warning('Timed out waiting on remote node when checking failover status')
+            return 'UNKNOWN'
         except Exception as e:
             # Anything other than ClientException is unexpected and should be logged
             if not isinstance(e, CallError):
                 self.logger.warning('Failed checking failover status', exc_info=True)
             return 'UNKNOWN'
 
+    @private
+    async def state(self):
+        # composite licensed/status guard used by the hooks; cached briefly
+        # so bursts of hook invocations dispatch the pair of calls once
+        if FailoverService.STATE_CACHE is not None and time.monotonic() - FailoverService.STATE_CACHE_TS < 1.0:
+            return FailoverService.STATE_CACHE
+
+        state = {
+            'licensed': await self.middleware.call('failover.licensed'),
+            'status': await self.middleware.call('failover.status'),
+        }
+        FailoverService.STATE_CACHE = state
+        FailoverService.STATE_CACHE_TS = time.monotonic()
+        return state
+
     @private
     async def status_refresh(self):
+        FailoverService.STATE_CACHE = None
         await self.middleware.call('cache.pop', 'failover_status')
         # Kick a new status so it may be ready on next user call
         await self.middleware.call('failover.status')
@@ -266,16 +376,15 @@ class FailoverService(ConfigService):
         """
         Returns True if there is an ongoing failover event.
         """
-        event = self.middleware.call_sync(
-            'core.get_jobs', [
-                ('method', 'in', [
-                    'failover.events.vrrp_master',
-                    'failover.events.vrrp_backup'
-                ]),
-                ('state', '=', 'RUNNING'),
-            ]
+        # inspect the in-process job registry directly instead of having
+        # core.get_jobs serialize and filter every historical job
+        return any(
+            job.state == State.RUNNING and job.method_name in (
+                'failover.events.vrrp_master',
+                'failover.events.vrrp_backup',
+            )
+            for job in self.middleware.jobs.all().values()
         )
-        return bool(event)
 
     @no_auth_required
     @throttle(seconds=2, condition=throttle_condition)
@@ -316,7 +425,7 @@ class FailoverService(ConfigService):
         if await self.middleware.call('failover.status') == 'MASTER':
             return False
 
-        crit_ints = [i for i in await self.middleware.call('interface.query') if i.get('failover_critical', False)]
+        crit_ints = await self.middleware.call('interface.query', [('failover_critical', '=', True)])
         if crit_ints:
             await self.middleware.call('failover.events.event', crit_ints[0]['name'], 'forcetakeover')
             return True
@@ -347,10 +456,22 @@ class FailoverService(ConfigService):
         self.middleware.call_sync('failover.sync_keys_to_remote_node')
 
         self.logger.debug('Syncing zpool cachefile, license, pwenc and authorized_keys files to' + standby)
-        self.send_small_file('/data/license')
-        self.send_small_file('/data/pwenc_secret')
-        self.send_small_file('/root/.ssh/authorized_keys')
-        self.send_small_file(ZPOOL_CACHE_FILE, ZPOOL_CACHE_FILE_OVERWRITE)
+        files = (
+            ('/data/license', None),
+            ('/data/pwenc_secret', None),
+            ('/root/.ssh/authorized_keys', None),
+            (ZPOOL_CACHE_FILE, ZPOOL_CACHE_FILE_OVERWRITE),
+        )
+        errors = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(files)) as tpe:
+            futures = {tpe.submit(self.send_small_file, path, dest): path for path, dest in files}
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f'{futures[future]}: {e}')
+        if errors:
+            raise CallError(f'Failed to sync files to{standby} {", ".join(errors)}')
         self.middleware.call_sync('failover.call_remote', 'failover.zpool.cachefile.setup', ['SYNC'])
 
         self.middleware.call_sync(
@@ -392,7 +513,15 @@ class FailoverService(ConfigService):
 
     @private
     def receive_database(self):
-        os.rename(FREENAS_DATABASE + '.sync', FREENAS_DATABASE)
+        os.replace(FREENAS_DATABASE + '.sync', FREENAS_DATABASE)
+        # fsync the parent directory so the rename is durable before the
+        # datastore starts using the new file; a crash here must not leave
+        # a half-synced database behind
+        dirfd = os.open(os.path.dirname(FREENAS_DATABASE), os.O_DIRECTORY)
+        try:
+            os.fsync(dirfd)
+        finally:
+            os.close(dirfd)
         self.middleware.call_sync('datastore.setup')
 
     @private
@@ -401,17 +530,14 @@ class FailoverService(ConfigService):
             dest = path
         if not os.path.exists(path):
             return
-        mode = os.stat(path).st_mode
-        with open(path, 'rb') as f:
-            first = True
-            while True:
-                read = f.read(1024 * 1024 * 10)
-                if not read:
-                    break
-                self.middleware.call_sync('failover.call_remote', 'filesystem.file_receive', [
-                    dest, base64.b64encode(read).decode(), {'mode': mode, 'append': not first}
-                ])
-                first = False
+        st = os.stat(path)
+        if st.st_size == 0:
+            return
+        # ship the raw bytes over the same binary upload path the database
+        # sync uses; base64-chunked filesystem.file_receive wasted ~33%
+        # bandwidth and an encode pass per chunk
+        token = self.middleware.call_sync('failover.call_remote', 'auth.generate_token')
+        self.middleware.call_sync('failover.sendfile', token, path, dest, {'mode': st.st_mode})
 
     @private
     async def mismatch_disks(self):
@@ -435,16 +561,22 @@ class FailoverService(ConfigService):
          2. the quantity of disks are the same between
             controllers but serials do not match
         """
-        local_boot_disks = await self.middleware.call('boot.get_disks')
-        remote_boot_disks = await self.middleware.call('failover.call_remote', 'boot.get_disks')
+        local_boot_disks, remote_boot_disks, local_disk_info, remote_disk_info = await asyncio.gather(
+            self.middleware.call('boot.get_disks'),
+            self.middleware.call('failover.call_remote', 'boot.get_disks'),
+            self.middleware.call('device.get_info', 'DISK'),
+            self.middleware.call('failover.call_remote', 'device.get_info', ['DISK']),
+        )
+        local_boot_disks = frozenset(local_boot_disks)
+        remote_boot_disks = frozenset(remote_boot_disks)
         local_disks = set(
             v['ident']
-            for k, v in (await self.middleware.call('device.get_info', 'DISK')).items()
+            for k, v in local_disk_info.items()
             if k not in local_boot_disks
         )
         remote_disks = set(
             v['ident']
-            for k, v in (await self.middleware.call('failover.call_remote', 'device.get_info', ['DISK'])).items()
+            for k, v in remote_disk_info.items()
             if k not in remote_boot_disks
         )
         return {
@@ -527,6 +659,13 @@ class FailoverService(ConfigService):
             'cache.get_or_put', 'failover_encryption_keys', 0, lambda: {'geli': {}, 'zfs': {}}
         )
 
+    def _keys_need_update(self, keys, options):
+        return any(
+            keys['geli'].get(pool['name']) != pool['passphrase'] for pool in options['pools']
+        ) or any(
+            keys['zfs'].get(dataset['name']) != dataset['passphrase'] for dataset in options['datasets']
+        )
+
     @private
     @accepts(
         Dict(
@@ -558,8 +697,17 @@ class FailoverService(ConfigService):
         if not options['pools'] and not options['datasets']:
             raise CallError('Please specify pools/datasets to update')
 
+        # cheap pre-check so no-op callers don't contend the cache lock;
+        # re-verified under the lock before mutating
+        if not self._keys_need_update(await self.encryption_keys(), options):
+            return
+
         async with ENCRYPTION_CACHE_LOCK:
             keys = await self.encryption_keys()
+            if not self._keys_need_update(keys, options):
+                # idempotent retry; don't rewrite the cache or push a
+                # full key sync to the standby for nothing
+                return
             for pool in options['pools']:
                 keys['geli'][pool['name']] = pool['passphrase']
             for dataset in options['datasets']:
@@ -583,14 +731,28 @@ class FailoverService(ConfigService):
         if not options['pools'] and not options['datasets']:
             raise CallError('Please specify pools/datasets to remove')
 
+        exacts = set(options['datasets'])
+        prefixes = tuple(f'{dataset}/' for dataset in options['datasets'])
+
+        def to_remove(keys):
+            return [
+                ('geli', k) for k in options['pools'] if k in keys['geli']
+            ] + [
+                ('zfs', k) for k in keys['zfs'] if k in exacts or k.startswith(prefixes)
+            ]
+
+        # cheap pre-check so no-op callers don't contend the cache lock;
+        # re-computed under the lock before mutating
+        if not to_remove(await self.encryption_keys()):
+            return
+
         async with ENCRYPTION_CACHE_LOCK:
             keys = await self.encryption_keys()
-            for pool in options['pools']:
-                keys['geli'].pop(pool, None)
-            for dataset in options['datasets']:
-                keys['zfs'] = {
-                    k: v for k, v in keys['zfs'].items() if k != dataset and not k.startswith(f'{dataset}/')
-                }
+            removals = to_remove(keys)
+            if not removals:
+                return
+            for section, k in removals:
+                del keys[section][k]
             await self.middleware.call('cache.put', 'failover_encryption_keys', keys)
             if options['sync_keys']:
                 await self.sync_keys_to_remote_node(lock=False)
@@ -614,7 +776,7 @@ class FailoverService(ConfigService):
         else:
             node = await self._master_node(options.get('active'))
 
-        failover = await self.middleware.call('datastore.config', 'system.failover')
+        failover = await self.config()
         if action == 'ENABLE':
             if failover['disabled'] is False:
                 # Already enabled
@@ -633,6 +795,7 @@ class FailoverService(ConfigService):
             }
 
         await self.middleware.call('datastore.update', 'system.failover', failover['id'], update)
+        await self.middleware.call('failover.status_refresh')
 
     @private
     def upgrade_version(self):
@@ -673,6 +836,13 @@ class FailoverService(ConfigService):
 
         local_path = self.middleware.call_sync('update.get_update_location')
 
+        # probe standby readiness in the background; when a manual update
+        # file was provided this overlaps the remote round-trip with writing
+        # the upload to local storage
+        tpe = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        standby_ready = tpe.submit(self.middleware.call_sync, 'failover.call_remote', 'system.ready')
+        tpe.shutdown(wait=False)
+
         if updatefile:
             # means manual update file was provided so write it
             # to local storage
@@ -681,10 +851,22 @@ class FailoverService(ConfigService):
             updatefile_localpath = os.path.join(local_path, updatefile_name)
             os.makedirs(local_path, exist_ok=True)
             with open(updatefile_localpath, 'wb') as f:
-                shutil.copyfileobj(job.pipes.input.r, f, 1048576)
+                src = job.pipes.input.r
+                moved = 0
+                try:
+                    # move the upload pipe-to-file in kernel space instead of
+                    # bouncing every megabyte through a userland buffer
+                    while n := os.splice(src.fileno(), f.fileno(), 1048576):
+                        moved += n
+                except (AttributeError, OSError):
+                    # no os.splice, or the input is not a pipe (buffered
+                    # uploads are backed by a regular file)
+                    if moved:
+                        raise
+                    shutil.copyfileobj(src, f, 1048576)
 
         try:
-            if not self.middleware.call_sync('failover.call_remote', 'system.ready'):
+            if not standby_ready.result():
                 raise CallError('Standby Controller is not ready.')
 
             if not updatefile:
@@ -711,13 +893,21 @@ class FailoverService(ConfigService):
                 # means update file was provided to us so send it to the standby
                 job.set_progress(None, 'Sending files to Standby Controller')
                 token = self.middleware.call_sync('failover.call_remote', 'auth.generate_token')
-                for f in os.listdir(local_path):
-                    self.middleware.call_sync(
-                        'failover.sendfile',
-                        token,
-                        os.path.join(local_path, f),
-                        os.path.join(remote_path, f)
-                    )
+                # the update artifacts are independent, so a few parallel
+                # streams make better use of the interlink than one
+                with concurrent.futures.ThreadPoolExecutor(max_workers=4) as tpe:
+                    futures = [
+                        tpe.submit(
+                            self.middleware.call_sync,
+                            'failover.sendfile',
+                            token,
+                            os.path.join(local_path, f),
+                            os.path.join(remote_path, f)
+                        )
+                        for f in os.listdir(local_path)
+                    ]
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
 
             local_version = self.middleware.call_sync('system.version')
             remote_version = self.middleware.call_sync('failover.call_remote', 'system.version')
@@ -817,11 +1007,13 @@ class FailoverService(ConfigService):
         try:
             retry_time = time.monotonic()
             shutdown_timeout = 90  # seconds
-            while time.monotonic() - retry_time < shutdown_timeout:
+            delay = _BACKOFF_BASE
+            while (remaining := shutdown_timeout - (time.monotonic() - retry_time)) > 0:
                 self.middleware.call_sync(
                     'failover.call_remote', 'core.ping', [], {'timeout': 5}
                 )
-                time.sleep(5)
+                delay = _backoff_delay(delay, 5.0, remaining)
+                time.sleep(delay)
         except CallError:
             pass
         else:
@@ -853,15 +1045,18 @@ class FailoverService(ConfigService):
         This values come from observation from support of how long a M-series can take.
         """
         retry_time = time.monotonic()
-        while time.monotonic() - retry_time < seconds:
+        delay = _BACKOFF_BASE
+        while (remaining := seconds - (time.monotonic() - retry_time)) > 0:
             try:
                 if not self.middleware.call_sync('failover.call_remote', 'system.ready'):
-                    time.sleep(5)
+                    delay = _backoff_delay(delay, 15.0, remaining)
+                    time.sleep(delay)
                     continue
                 return True
             except CallError as e:
-                if e.errno in (errno.ECONNREFUSED, errno.ECONNRESET):
-                    time.sleep(5)
+                if e.errno in _TRANSIENT_CONN_ERRNOS:
+                    delay = _backoff_delay(delay, 15.0, remaining)
+                    time.sleep(delay)
                     continue
                 raise
         return False
@@ -903,12 +1098,8 @@ class FailoverService(ConfigService):
         if not local_bootenv or not remote_bootenv:
             raise CallError('Unable to determine installed version of software')
 
-        tn_version = re.compile(r'\d*\.?\d+')
-        loc_findall = tn_version.findall(local_bootenv[0]['id'])
-        rem_findall = tn_version.findall(remote_bootenv[0]['id'])
-
-        loc_vers = tuple(float(i) for i in loc_findall)
-        rem_vers = tuple(float(i) for i in rem_findall)
+        loc_vers = _bootenv_version(local_bootenv[0]['id'])
+        rem_vers = _bootenv_version(remote_bootenv[0]['id'])
 
         if loc_vers > rem_vers:
             return True
@@ -918,7 +1109,7 @@ class FailoverService(ConfigService):
     @accepts()
     @returns(Bool())
     @job(lock='failover_upgrade_finish')
-    def upgrade_finish(self, job):
+    async def upgrade_finish(self, job):
         """
         Perform the last stage of an HA upgrade.
 
@@ -926,22 +1117,30 @@ class FailoverService(ConfigService):
         Standby Controller and reboot it.
         """
 
-        if self.middleware.call_sync('failover.status') != 'MASTER':
+        if await self.middleware.call('failover.status') != 'MASTER':
             raise CallError('Upgrade can only run on Active Controller.')
 
         job.set_progress(None, 'Ensuring the Standby Controller is booted')
-        if not self.upgrade_waitstandby():
+        # look up the local boot environment while waiting on the standby so
+        # the remote activate can fire the moment readiness returns
+        standby_booted, local_bootenv = await asyncio.gather(
+            self.middleware.run_in_thread(self.upgrade_waitstandby),
+            self.middleware.call('bootenv.query', [('active', 'rin', 'N')]),
+        )
+        if not standby_booted:
             raise CallError('Timed out waiting for the Standby Controller to boot.')
 
         job.set_progress(None, 'Activating new boot environment')
-        local_bootenv = self.middleware.call_sync('bootenv.query', [('active', 'rin', 'N')])
         if not local_bootenv:
             raise CallError('Could not find current boot environment.')
-        self.middleware.call_sync('failover.call_remote', 'bootenv.activate', [local_bootenv[0]['id']])
+        await self.middleware.call('failover.call_remote', 'bootenv.activate', [local_bootenv[0]['id']])
 
         job.set_progress(None, 'Rebooting Standby Controller')
-        self.middleware.call_sync('failover.call_remote', 'system.reboot', [{'delay': 10}])
-        self.middleware.call_sync('keyvalue.set', 'HA_UPGRADE', False)
+        # neither operation depends on the other
+        await asyncio.gather(
+            self.middleware.call('failover.call_remote', 'system.reboot', [{'delay': 10}]),
+            self.middleware.call('keyvalue.set', 'HA_UPGRADE', False),
+        )
         return True
 
     @private
@@ -949,11 +1148,12 @@ class FailoverService(ConfigService):
         """
         Sync ZFS encryption keys from the active node.
         """
-        if not await self.middleware.call('failover.licensed'):
+        state = await self.middleware.call('failover.state')
+        if not state['licensed']:
             return
 
         # only sync keys if we're the BACKUP node
-        if (await self.middleware.call('failover.status')) != 'BACKUP':
+        if state['status'] != 'BACKUP':
             return
 
         # make sure we can contact the MASTER node
@@ -977,11 +1177,12 @@ class FailoverService(ConfigService):
         """
         Sync ZFS encryption keys to the standby node.
         """
-        if not await self.middleware.call('failover.licensed'):
+        state = await self.middleware.call('failover.state')
+        if not state['licensed']:
             return
 
         # only sync keys if we're the MASTER node
-        if (await self.middleware.call('failover.status')) != 'MASTER':
+        if state['status'] != 'MASTER':
             return
 
         # make sure we can contact the BACKUP node
@@ -993,28 +1194,36 @@ class FailoverService(ConfigService):
             )
             return
 
+        async def sync_zfs_keys():
+            keys = await self.encryption_keys()
+            await self.middleware.call(
+                'failover.call_remote', 'cache.put', ['failover_encryption_keys', keys]
+            )
+
+        async def sync_kmip_keys():
+            kmip_keys = await self.middleware.call('kmip.kmip_memory_keys')
+            await self.middleware.call(
+                'failover.call_remote', 'kmip.update_memory_keys', [kmip_keys]
+            )
+
         async with ENCRYPTION_CACHE_LOCK if lock else asyncnullcontext():
-            try:
-                keys = await self.encryption_keys()
-                await self.middleware.call(
-                    'failover.call_remote', 'cache.put', ['failover_encryption_keys', keys]
-                )
-            except Exception as e:
+            # the two pushes are independent, so overlap their round trips
+            zfs_result, kmip_result = await asyncio.gather(
+                sync_zfs_keys(), sync_kmip_keys(), return_exceptions=True,
+            )
+            if isinstance(zfs_result, Exception):
                 await self.middleware.call('alert.oneshot_create', 'FailoverKeysSyncFailed', None)
-                self.logger.error('Failed to sync keys with standby controller: %s', str(e), exc_info=True)
+                self.logger.error(
+                    'Failed to sync keys with standby controller: %s', str(zfs_result), exc_info=zfs_result
+                )
             else:
                 await self.middleware.call('alert.oneshot_delete', 'FailoverKeysSyncFailed', None)
-            try:
-                kmip_keys = await self.middleware.call('kmip.kmip_memory_keys')
-                await self.middleware.call(
-                    'failover.call_remote', 'kmip.update_memory_keys', [kmip_keys]
-                )
-            except Exception as e:
+            if isinstance(kmip_result, Exception):
                 await self.middleware.call(
-                    'alert.oneshot_create', 'FailoverKMIPKeysSyncFailed', {'error': str(e)}
+                    'alert.oneshot_create', 'FailoverKMIPKeysSyncFailed', {'error': str(kmip_result)}
                 )
                 self.logger.error(
-                    'Failed to sync KMIP keys with standby controller: %s', str(e), exc_info=True
+                    'Failed to sync KMIP keys with standby controller: %s', str(kmip_result), exc_info=kmip_result
                 )
             else:
                 await self.middleware.call('alert.oneshot_delete', 'FailoverKMIPKeysSyncFailed', None)
@@ -1037,8 +1246,13 @@ async def ha_permission(middleware, app):
 
     remote_addr, remote_port = app.request.transport.get_extra_info('peername')
 
-    if remote_port <= 1024 and remote_addr in ('169.254.10.1', '169.254.10.2'):
-        AuthService.session_manager.login(app, TruenasNodeSessionManagerCredentials())
+    if remote_port <= 1024:
+        try:
+            ip_int = struct.unpack('!I', socket.inet_aton(remote_addr))[0]
+        except OSError:
+            return
+        if ip_int in _HA_PEER_INTS:
+            AuthService.session_manager.login(app, TruenasNodeSessionManagerCredentials())
 
 
 async def interface_pre_sync_hook(middleware):
@@ -1048,6 +1262,8 @@ async def interface_pre_sync_hook(middleware):
 async def hook_license_update(middleware, *args, **kwargs):
     FailoverService.HA_MODE = None
     FailoverService.HA_LICENSED = None
+    FailoverService.NODE = None
+    FailoverService.STATE_CACHE = None
 
     if not await middleware.call('failover.licensed'):
         return
@@ -1067,15 +1283,18 @@ async def hook_license_update(middleware, *args, **kwargs):
         except Exception:
             middleware.logger.warning('Failed to sync db to standby')
 
-        try:
-            await middleware.call('failover.call_remote', 'failover.ensure_remote_client')
-        except Exception:
-            middleware.logger.warning('Failed to ensure remote client on standby')
-
-        try:
-            await middleware.call('failover.call_remote', 'etc.generate', ['rc'])
-        except Exception:
-            middleware.logger.warning('etc.generate failed on standby')
+        # the remaining standby calls are independent of each other
+        results = await asyncio.gather(
+            middleware.call('failover.call_remote', 'failover.ensure_remote_client'),
+            middleware.call('failover.call_remote', 'etc.generate', ['rc']),
+            return_exceptions=True,
+        )
+        for result, msg in zip(results, (
+            'Failed to ensure remote client on standby',
+            'etc.generate failed on standby',
+        )):
+            if isinstance(result, Exception):
+                middleware.logger.warning(msg)
 
     await middleware.call('failover.status_refresh')
 
@@ -1257,6 +1476,22 @@ async def hook_kmip_sync(middleware, *args, **kwargs):
     await middleware.call('failover.sync_keys_to_remote_node')
 
 
+# bounds the number of in-flight service propagations to the standby
+_SERVICE_REMOTE_SEM = asyncio.Semaphore(32)
+
+
+async def _service_remote_propagate(middleware, service, verb, options):
+    try:
+        await middleware.call('failover.call_remote', 'core.bulk', [
+            f'service.{verb}', [[service, options]]
+        ])
+    except Exception as e:
+        if not (isinstance(e, CallError) and e.errno in _TRANSIENT_CONN_ERRNOS):
+            middleware.logger.warning(f'Failed to run {verb}({service})', exc_info=True)
+    finally:
+        _SERVICE_REMOTE_SEM.release()
+
+
 async def service_remote(middleware, service, verb, options):
     """
     Most of service actions need to be replicated to the standby node so we don't lose
@@ -1267,23 +1502,15 @@ async def service_remote(middleware, service, verb, options):
     if not options['ha_propagate']:
         return
     # Skip if service is blacklisted or we are not MASTER
-    if service in (
-        'system',
-        'webshell',
-        'smartd',
-        'nfs',
-    ) or await middleware.call('failover.status') != 'MASTER':
+    if service in _BLACKLISTED_SERVICES or (await middleware.call('failover.state'))['status'] != 'MASTER':
         return
     # Nginx should never be stopped on standby node
     if service == 'nginx' and verb == 'stop':
         return
-    try:
-        await middleware.call('failover.call_remote', 'core.bulk', [
-            f'service.{verb}', [[service, options]]
-        ])
-    except Exception as e:
-        if not (isinstance(e, CallError) and e.errno in (errno.ECONNREFUSED, errno.ECONNRESET)):
-            middleware.logger.warning(f'Failed to run {verb}({service})', exc_info=True)
+    # don't serialize the local service action on the standby finishing
+    # its verb; propagate in the background
+    await _SERVICE_REMOTE_SEM.acquire()
+    asyncio.ensure_future(_service_remote_propagate(middleware, service, verb, options))
 
 
 async def ready_system_sync_keys(middleware):
@@ -1293,7 +1520,7 @@ async def ready_system_sync_keys(middleware):
 async def _event_system(middleware, event_type, args):
     if args['id'] == 'ready':
         # called when system is ready to issue an event in case HA upgrade is pending.
-        if await middleware.call('failover.status') in ('MASTER', 'SINGLE'):
+        if (await middleware.call('failover.state'))['status'] in ('MASTER', 'SINGLE'):
             return
 
         if await middleware.call('keyvalue.get', 'HA_UPGRADE', False):
@@ -1302,8 +1529,29 @@ async def _event_system(middleware, event_type, args):
         await middleware.call('failover.fenced.stop', True)
 
 
+# coalesce bursts of remote connect/disconnect/system events into a single
+# status refresh instead of one refresh per event
+_REFRESH_DEBOUNCE = 0.25
+_pending_refresh = None
+
+
+def _schedule_status_refresh(middleware):
+    def _fire():
+        global _pending_refresh
+        _pending_refresh = None
+        asyncio.ensure_future(middleware.call('failover.status_refresh'))
+
+    def _schedule():
+        global _pending_refresh
+        if _pending_refresh is None:
+            _pending_refresh = middleware.loop.call_later(_REFRESH_DEBOUNCE, _fire)
+
+    # this callback runs on the remote client thread
+    middleware.loop.call_soon_threadsafe(_schedule)
+
+
 def remote_status_event(middleware, *args, **kwargs):
-    middleware.call_sync('failover.status_refresh')
+    _schedule_status_refresh(middleware)
 
 
 async def setup(middleware):
@@ -1,3 +1,7 @@
+import asyncio
+import threading
+import time
+
 from middlewared.schema import accepts, returns, List, Str
 from middlewared.service import Service, throttle, pass_app, no_auth_required, private
 from middlewared.plugins.failover_.utils import throttle_condition
@@ -11,6 +15,13 @@ class FailoverDisabledReasonsService(Service):
 
     LAST_DISABLED_REASONS = None
 
+    # short-lived shared result so a burst of concurrent UI pollers costs
+    # one get_reasons computation (and one set of remote RPCs) per window
+    CACHE_TTL = 2.0
+    CACHE_TS = 0.0
+    CACHE_VAL = None
+    CACHE_LOCK = threading.Lock()
+
     @no_auth_required
     @throttle(seconds=2, condition=throttle_condition)
     @accepts()
@@ -31,7 +42,17 @@ class FailoverDisabledReasonsService(Service):
         NO_CRITICAL_INTERFACES - No network interfaces are marked critical for failover.
         NO_FENCED - Zpools are imported but fenced isn't running.
         """
-        reasons = self.middleware.call_sync('failover.disabled.get_reasons', app)
+        cls = FailoverDisabledReasonsService
+        if cls.CACHE_VAL is not None and time.monotonic() - cls.CACHE_TS < cls.CACHE_TTL:
+            return list(cls.CACHE_VAL)
+
+        with cls.CACHE_LOCK:
+            if cls.CACHE_VAL is not None and time.monotonic() - cls.CACHE_TS < cls.CACHE_TTL:
+                return list(cls.CACHE_VAL)
+            reasons = self.middleware.call_sync('failover.disabled.get_reasons', app)
+            cls.CACHE_VAL = reasons
+            cls.CACHE_TS = time.monotonic()
+
         if reasons != FailoverDisabledReasonsService.LAST_DISABLED_REASONS:
             FailoverDisabledReasonsService.LAST_DISABLED_REASONS = reasons
             self.middleware.send_event(
@@ -41,34 +62,46 @@ class FailoverDisabledReasonsService(Service):
         return list(reasons)
 
     @private
-    def get_reasons(self, app):
+    async def get_reasons(self, app):
         reasons = set()
 
-        if self.middleware.call_sync('failover.config')['disabled']:
+        config, ifaces = await asyncio.gather(
+            self.middleware.call('failover.config'),
+            self.middleware.call('interface.query'),
+        )
+        if config['disabled']:
             reasons.add('NO_FAILOVER')
-
-        ifaces = self.middleware.call_sync('interface.query')
         crit_iface = vip = master = False
         for iface in ifaces:
-            if iface['failover_critical']:
+            if not crit_iface and iface['failover_critical']:
                 # only need 1 interface marked critical for failover
                 crit_iface = True
 
-            if iface['failover_virtual_aliases']:
+            if not vip and iface['failover_virtual_aliases']:
                 # only need 1 interface with a virtual IP
                 vip = True
 
-            if any((i['state'] == 'MASTER' for i in iface['state'].get('vrrp_config') or [])):
-                # means this interface is MASTER
-                master = True
+            if not master:
+                for i in iface['state'].get('vrrp_config') or []:
+                    if i['state'] == 'MASTER':
+                        # means this interface is MASTER
+                        master = True
+                        break
+
+            if crit_iface and vip and master:
+                break
 
         if not crit_iface:
             reasons.add('NO_CRITICAL_INTERFACES')
         elif not vip:
             reasons.add('NO_VIP')
         elif master:
-            fenced_running = self.middleware.call_sync('failover.fenced.run_info')['running']
-            num_of_zpools_imported = len(self.middleware.call_sync('zfs.pool.query_imported_fast'))
+            fenced_info, local_imported = await asyncio.gather(
+                self.middleware.call('failover.fenced.run_info'),
+                self.middleware.call('zfs.pool.query_imported_fast'),
+            )
+            fenced_running = fenced_info['running']
+            num_of_zpools_imported = len(local_imported)
             if num_of_zpools_imported > 1:
                 # boot pool is returned by default which is why we check > 1
                 if not fenced_running:
@@ -79,7 +112,7 @@ class FailoverDisabledReasonsService(Service):
                 reasons.add('NO_VOLUME')
 
         try:
-            assert self.middleware.call_sync('failover.remote_connected')
+            assert await self.middleware.call('failover.remote_connected')
 
             # if the remote node panic's (this happens on failover event if we cant export the
             # zpool in 4 seconds on freeBSD systems (linux reboots silently by design)
@@ -91,21 +124,29 @@ class FailoverDisabledReasonsService(Service):
             # on failover events because it delays the process of restarting services in a timely
             # manner. To work around this, we place a `timeout` of 5 seconds on the system.ready
             # call. This essentially bypasses the TCP timeout window.
-            if not self.middleware.call_sync('failover.call_remote', 'system.ready', [], {'timeout': 5}):
+            # The remote probes are independent, so overlap their round trips
+            # (and the local lookups) instead of paying each RTT serially.
+            remote_ready, remote_imported, remote_licensed, local, remote, mismatch_disks = await asyncio.gather(
+                self.middleware.call('failover.call_remote', 'system.ready', [], {'timeout': 5}),
+                self.middleware.call('failover.call_remote', 'zfs.pool.query_imported_fast'),
+                self.middleware.call('failover.call_remote', 'failover.licensed'),
+                self.middleware.call('failover.vip.get_states', ifaces),
+                self.middleware.call('failover.call_remote', 'failover.vip.get_states'),
+                self.middleware.call('failover.mismatch_disks'),
+            )
+
+            if not remote_ready:
                 reasons.add('NO_SYSTEM_READY')
 
-            if len(self.middleware.call_sync('failover.call_remote', 'zfs.pool.query_imported_fast')) <= 1:
+            if len(remote_imported) <= 1:
                 reasons.add('NO_VOLUME')
 
-            if not self.middleware.call_sync('failover.call_remote', 'failover.licensed'):
+            if not remote_licensed:
                 reasons.add('NO_LICENSE')
 
-            local = self.middleware.call_sync('failover.vip.get_states', ifaces)
-            remote = self.middleware.call_sync('failover.call_remote', 'failover.vip.get_states')
-            if self.middleware.call_sync('failover.vip.check_states', local, remote):
+            if await self.middleware.call('failover.vip.check_states', local, remote):
                 reasons.add('DISAGREE_VIP')
 
-            mismatch_disks = self.middleware.call_sync('failover.mismatch_disks')
             if mismatch_disks['missing_local'] or mismatch_disks['missing_remote']:
                 reasons.add('MISMATCH_DISKS')
         except Exception:
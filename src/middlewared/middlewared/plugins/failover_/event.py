@@ -1,15 +1,15 @@
 import asyncio
 import os
+import re
 import sys
 import time
 import contextlib
-import threading
 import logging
 import errno
 from collections import defaultdict
 
-from middlewared.utils import filter_list
-from middlewared.service import Service, job, accepts
+from middlewared.job import State
+from middlewared.service import CallError, Service, job, accepts
 from middlewared.schema import Dict, Bool, Int
 from middlewared.plugins.failover_.zpool_cachefile import ZPOOL_CACHE_FILE
 from middlewared.plugins.failover_.event_exceptions import AllZpoolsFailedToImport, IgnoreFailoverEvent, FencedError
@@ -18,6 +18,10 @@ from libzfs import Error as libzfs_errnos
 
 logger = logging.getLogger('failover')
 
+# libzfs errno value -> name, so the import retry path doesn't linearly
+# scan the enum on every failed pool import
+_LIBZFS_ERRNO_BY_VALUE = {i.value: i.name for i in libzfs_errnos}
+
 
 # When we get to the point of transitioning to MASTER or BACKUP
 # we wrap the associated methods (`vrrp_master` and `vrrp_backup`)
@@ -66,12 +70,9 @@ class FailoverEventsService(Service):
     # zpool(s) when becoming the BACKUP node
     ZPOOL_EXPORT_TIMEOUT = 4  # seconds
 
-    async def restart_service(self, service, timeout):
+    async def restart_service(self, service):
         logger.info('Restarting %s', service)
-        return await asyncio.wait_for(
-            self.middleware.call('service.restart', service, self.HA_PROPAGATE),
-            timeout=timeout,
-        )
+        return await self.middleware.call('service.restart', service, self.HA_PROPAGATE)
 
     @accepts(Dict(
         'restart_services',
@@ -88,26 +89,52 @@ class FailoverEventsService(Service):
         `timeout` Integer representing the maximum amount
         of time to wait for a given service to (re)start.
         """
-        to_restart = await self.middleware.call('datastore.query', 'services_services')
-        to_restart = [i['srv_service'] for i in to_restart if i['srv_enable']]
+        services = await self.middleware.call(
+            'datastore.query', 'services_services', [], {'select': ['srv_service', 'srv_enable']}
+        )
+        k8s_enabled = False
+        if not data['critical']:
+            k8s_enabled = bool((await self.middleware.call('kubernetes.config'))['dataset'])
+        await self.restart_services_with(services, k8s_enabled, data)
+
+    async def restart_services_with(self, services, k8s_enabled, data):
+        """
+        Like `restart_services` but with the service rows and kubernetes
+        state passed in, so both phases of a failover event can share a
+        single lookup.
+        """
+        to_restart = [i['srv_service'] for i in services if i['srv_enable']]
         if data['critical']:
             to_restart = [i for i in to_restart if i in self.CRITICAL_SERVICES]
         else:
             to_restart = [i for i in to_restart if i not in self.CRITICAL_SERVICES]
             # restart any kubernetes applications
-            if (await self.middleware.call('kubernetes.config'))['dataset']:
+            if k8s_enabled:
                 to_restart.append('kubernetes')
 
-        exceptions = await asyncio.gather(
-            *[self.restart_service(svc, data['timeout']) for svc in to_restart],
-            return_exceptions=True
-        )
-        for svc, exc in zip(to_restart, exceptions):
-            if isinstance(exc, asyncio.TimeoutError):
-                logger.error(
-                    'Failed to restart service "%s" after %d seconds',
-                    svc, data['timeout']
-                )
+        tasks = {
+            svc: asyncio.ensure_future(self.restart_service(svc))
+            for svc in to_restart
+        }
+        try:
+            # one shared deadline bounds the whole phase instead of a
+            # timer-wrapped future per service
+            exceptions = await asyncio.wait_for(
+                asyncio.gather(*tasks.values(), return_exceptions=True),
+                timeout=data['timeout'],
+            )
+        except asyncio.TimeoutError:
+            for svc, task in tasks.items():
+                if not task.done():
+                    task.cancel()
+                    logger.error(
+                        'Failed to restart service "%s" after %d seconds',
+                        svc, data['timeout']
+                    )
+            return
+        for svc, exc in zip(tasks, exceptions):
+            if isinstance(exc, Exception):
+                logger.error('Failed to restart service "%s": %r', svc, exc)
 
     async def background(self):
         """
@@ -128,6 +155,21 @@ class FailoverEventsService(Service):
         except Exception:
             raise
 
+    async def run_many(self, calls):
+        """
+        Run independent middleware calls concurrently during a failover
+        event. Individual failures are logged instead of raised so one
+        misbehaving step doesn't abort the whole event.
+        """
+        results = await asyncio.gather(
+            *(self.middleware.call(method, *params) for method, params in calls),
+            return_exceptions=True,
+        )
+        for (method, params), result in zip(calls, results):
+            if isinstance(result, Exception):
+                logger.error('%s failed during failover event', method, exc_info=result)
+        return results
+
     def event(self, ifname, event):
 
         refresh = True
@@ -141,55 +183,195 @@ class FailoverEventsService(Service):
             if refresh:
                 self.run_call('failover.status_refresh')
 
-    def _export_zpools(self, volumes):
+    async def backup_prep(self):
+        """
+        Blocking network traffic, transitioning the VIPs off this node and
+        writing the watchdog sentinel are independent of one another, so
+        overlap them to shorten the time until the zpools can be exported.
+        """
+        async def block_traffic():
+            logger.info('Blocking network traffic.')
+            fw_drop_job = await self.middleware.call('failover.firewall.drop_all')
+            await fw_drop_job.wait()
+            if fw_drop_job.error:
+                logger.error(f'Error blocking network traffic: {fw_drop_job.error}')
+
+        async def transition_vips():
+            # restarting keepalived sends a priority 0 advertisement
+            # which means any VIP that is on this controller will be
+            # migrated to the other controller
+            logger.info('Transitioning all VIPs off this node')
+            await self.middleware.call('service.restart', 'keepalived')
+
+        def write_sentinel():
+            # ticket 23361 enabled a feature to send email alerts when an unclean reboot occurrs.
+            # TrueNAS HA, by design, has a triggered unclean shutdown.
+            # If a controller is demoted to standby, we set a 4 sec countdown using watchdog.
+            # If the zpool(s) can't export within that timeframe, we use watchdog to violently reboot the controller.
+            # When this occurrs, the customer gets an email about an "Unauthorized system reboot".
+            # The idea for creating a new sentinel file for watchdog related panics,
+            # is so that we can send an appropriate email alert.
+            # So if we panic here, middleware will check for this file and send an appropriate email.
+            # ticket 39114
+            with contextlib.suppress(Exception):
+                # O_DSYNC makes the write itself synchronous so the sentinel
+                # is durable before a potential sysrq reboot, without a
+                # buffered writer plus flush plus fsync for 4 bytes
+                fd = os.open(self.WATCHDOG_ALERT_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DSYNC, 0o600)
+                try:
+                    os.write(fd, int(time.time()).to_bytes(4, sys.byteorder))
+                finally:
+                    os.close(fd)
+
+        await asyncio.gather(
+            block_traffic(),
+            transition_vips(),
+            self.middleware.run_in_thread(write_sentinel),
+        )
 
-        # export the zpool(s)
+    async def export_zpools(self, volumes):
+        """
+        Export the zpool(s), bounded by `ZPOOL_EXPORT_TIMEOUT`. Returns
+        False when the export failed or did not finish within the limit,
+        in which case the caller violently reboots the system.
+        """
         try:
-            for vol in volumes:
-                if vol['status'] != 'OFFLINE':
-                    self.middleware.call_sync('zfs.pool.export', vol['name'], {'force': True})
-                    logger.info('Exported "%s"', vol['name'])
+            await asyncio.wait_for(self._export_zpools(volumes), timeout=self.ZPOOL_EXPORT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error('Timed out exporting zpool(s) after %d seconds', self.ZPOOL_EXPORT_TIMEOUT)
+            return False
         except Exception as e:
-            # catch any exception that could be raised
-            # We sleep for 5 seconds here because this is
-            # in its own thread. The calling thread waits
-            # for self.ZPOOL_EXPORT_TIMEOUT and if this
-            # thread is_alive(), then we violently reboot
-            # the node
-            logger.error('Error exporting "%s" with error %s', vol['name'], e)
-            time.sleep(self.ZPOOL_EXPORT_TIMEOUT + 1)
-
-    def generate_failover_data(self):
-
-        # only care about name, guid, and status
-        volumes = self.run_call(
-            'pool.query', [], {
+            logger.error('Error exporting zpool(s) with error %s', e)
+            return False
+        return True
+
+    async def _export_one(self, vol):
+        await self.middleware.call('zfs.pool.export', vol['name'], {'force': True})
+        logger.info('Exported "%s"', vol['name'])
+
+    async def _export_zpools(self, volumes):
+        # export the zpool(s) in parallel so the critical BACKUP window is
+        # bounded by the slowest pool, not the sum of all of them
+        to_export = [vol for vol in volumes if vol['status'] != 'OFFLINE']
+        results = await asyncio.gather(
+            *(self._export_one(vol) for vol in to_export), return_exceptions=True
+        )
+        for vol, result in zip(to_export, results):
+            if isinstance(result, Exception):
+                logger.error('Error exporting "%s" with error %s', vol['name'], result)
+        if any(isinstance(result, Exception) for result in results):
+            raise CallError('Failed to export zpool(s)')
+
+    async def generate_failover_data(self):
+
+        # the four lookups are independent, so issue them concurrently
+        # instead of paying each round-trip serially on the event hot path
+        volumes, failovercfg, interfaces, internal_ints = await asyncio.gather(
+            # only care about name, guid, and status
+            self.middleware.call('pool.query', [], {
                 'select': ['name', 'guid', 'status']
-            }
+            }),
+            self.middleware.call('failover.config'),
+            # only care about id, failover_critical and failover_group
+            self.middleware.call('interface.query', [], {
+                'select': ['id', 'failover_critical', 'failover_group']
+            }),
+            self.middleware.call('failover.internal_interfaces'),
         )
 
-        failovercfg = self.run_call('failover.config')
-        interfaces = self.run_call('interface.query')
-        internal_ints = self.run_call('failover.internal_interfaces')
+        groups = defaultdict(list)
+        non_crit = []
+        for i in interfaces:
+            if i.get('failover_critical'):
+                groups[i['failover_group']].append(i['id'])
+            else:
+                non_crit.append(i['id'])
 
-        data = {
+        return {
             'disabled': failovercfg['disabled'],
             'master': failovercfg['master'],
             'timeout': failovercfg['timeout'],
-            'groups': defaultdict(list),
+            'groups': groups,
             'volumes': volumes,
-            'non_crit_interfaces': [
-                i['id'] for i in filter_list(interfaces, [
-                    ('failover_critical', '!=', True),
-                ])
-            ],
+            # a plain list: fobj travels as a vrrp job argument and must
+            # stay JSON-serializable; membership tests on it are still exact
+            'non_crit_interfaces': non_crit,
             'internal_interfaces': internal_ints,
         }
 
-        for i in filter_list(interfaces, [('failover_critical', '=', True)]):
-            data['groups'][i['failover_group']].append(i['id'])
+    async def _import_pool(self, vol):
+        """
+        Import `vol`, retrying without the cachefile when it is stale or
+        missing, then unlock any encrypted datasets. Returns False (with
+        `vol['error']` set) when the import failed.
+        """
+        logger.info('Importing %r', vol['name'])
+        options = {'altroot': '/mnt'}
+        import_options = {'missing_log': True}
+        any_host = True
+        new_name = None
+
+        try_again = False
+        try:
+            await self.middleware.call(
+                'zfs.pool.import_pool', vol['guid'], options, any_host, ZPOOL_CACHE_FILE, new_name, import_options
+            )
+        except Exception as e:
+            error = _LIBZFS_ERRNO_BY_VALUE.get(e.errno, '')
+            if error == 'NOENT' or e.errno == errno.ENOENT:
+                # NOENT when cachefile exists and zpool isn't found from contents in cachefile
+                # ENONENT when the cachefile doesn't exist on disk
+                logger.warning('Failed importing %r using cachefile so trying without it.', vol['name'])
+                try_again = True
+            else:
+                vol['error'] = str(e)
+                return False
+
+        if try_again:
+            # means the cachefile is "stale" or invalid which will prevent
+            # an import so let's try to import without it
+            try:
+                await self.middleware.call(
+                    'zfs.pool.import_pool', vol['guid'], options, any_host, None, new_name, import_options
+                )
+            except Exception as e:
+                vol['error'] = str(e)
+                return False
+            try:
+                # make sure the zpool cachefile property is set appropriately
+                await self.middleware.call(
+                    'zfs.pool.update', vol['name'], {'properties': {'cachefile': {'value': ZPOOL_CACHE_FILE}}}
+                )
+            except Exception:
+                logger.warning('Failed to set cachefile property for %r', vol['name'], exc_info=True)
+
+        logger.info('Successfully imported %r', vol['name'])
+
+        # try to unlock the zfs datasets (if any)
+        unlock_job = await self.middleware.call('failover.unlock_zfs_datasets', vol['name'])
+        await unlock_job.wait()
+        if unlock_job.error:
+            logger.error(f'Error unlocking ZFS encrypted datasets: {unlock_job.error}')
+        elif unlock_job.result['failed']:
+            logger.error('Failed to unlock %s ZFS encrypted dataset(s)', ','.join(unlock_job.result['failed']))
+
+        return True
 
-        return data
+    async def import_pools(self, volumes):
+        """
+        Import all `volumes` concurrently, returning the ones that failed.
+        """
+        results = await asyncio.gather(
+            *(self._import_pool(vol) for vol in volumes), return_exceptions=True
+        )
+        failed = []
+        for vol, result in zip(volumes, results):
+            if isinstance(result, Exception):
+                vol['error'] = str(result)
+                failed.append(vol)
+            elif result is False:
+                failed.append(vol)
+        return failed
 
     def validate(self, ifname, event):
         """
@@ -210,19 +392,16 @@ class FailoverEventsService(Service):
                 and raise an `IgnoreFailoverEvent` exception.
         """
 
-        # first check if there is an ongoing failover event
-        current_events = self.run_call(
-            'core.get_jobs', [
-                ('OR', [
-                    ('method', '=', 'failover.events.vrrp_master'),
-                    ('method', '=', 'failover.events.vrrp_backup')
-                ]),
-                ('state', '=', 'RUNNING'),
-            ]
-        )
-        for i in current_events:
-            cur_iface = i['arguments'][1]
-            cur_event = i['arguments'][2]
+        # first check if there is an ongoing failover event; inspect the
+        # in-process job registry directly instead of serializing and
+        # filtering the entire job table through core.get_jobs per event
+        for i in self.middleware.jobs.all().values():
+            if i.state != State.RUNNING or i.method_name not in (
+                'failover.events.vrrp_master', 'failover.events.vrrp_backup'
+            ):
+                continue
+            cur_iface = i.args[1]
+            cur_event = i.args[2]
             msg = f'Received "{event}" event for "{ifname}" but a current event of "{cur_event}" is running'
             msg += f' for "{cur_iface}". Ignoring failover event.'
             logger.info(msg) if event == cur_event else logger.warning(msg)
@@ -231,7 +410,7 @@ class FailoverEventsService(Service):
     def _event(self, ifname, event):
 
         # generate data to be used during the failover event
-        fobj = self.generate_failover_data()
+        fobj = self.run_call('failover.events.generate_failover_data')
 
         if event != 'forcetakeover':
             if fobj['disabled'] and not fobj['master']:
@@ -244,17 +423,15 @@ class FailoverEventsService(Service):
                 raise IgnoreFailoverEvent()
 
             # If there is a state change on a non-critical interface then
-            # ignore the event and return
-            ignore = [i for i in fobj['non_crit_interfaces'] if i in ifname]
-            if ignore:
+            # ignore the event and return. Exact membership here: the old
+            # substring scan could match "eth1" against an event on "eth10".
+            if ifname in fobj['non_crit_interfaces']:
                 logger.warning('Ignoring state change on non-critical interface "%s".', ifname)
                 raise IgnoreFailoverEvent()
 
-            needs_imported = False
-            for pool in self.run_call('pool.query', [('name', 'in', [i['name'] for i in fobj['volumes']])]):
-                if pool['status'] == 'OFFLINE':
-                    needs_imported = True
-                    break
+            # fobj['volumes'] already carries each pool's status, so it is
+            # the source of truth for this decision; no need to re-query
+            needs_imported = any(vol['status'] == 'OFFLINE' for vol in fobj['volumes'])
 
             # means all zpools are already imported
             if event == 'MASTER' and not needs_imported:
@@ -372,61 +549,10 @@ class FailoverEventsService(Service):
         # set the progress to IMPORTING
         job.set_progress(None, description='IMPORTING')
 
-        failed = []
-        options = {'altroot': '/mnt'}
-        import_options = {'missing_log': True}
-        any_host = True
-        cachefile = ZPOOL_CACHE_FILE
-        new_name = None
-        for vol in fobj['volumes']:
-            logger.info('Importing %r', vol['name'])
-
-            # import the zpool(s)
-            try_again = False
-            try:
-                self.run_call(
-                    'zfs.pool.import_pool', vol['guid'], options, any_host, cachefile, new_name, import_options
-                )
-            except Exception as e:
-                error = next((i.name for i in libzfs_errnos if i.value == e.errno), '')
-                if error == 'NOENT' or e.errno == errno.ENOENT:
-                    # NOENT when cachefile exists and zpool isn't found from contents in cachefile
-                    # ENONENT when the cachefile doesn't exist on disk
-                    logger.warning('Failed importing %r using cachefile so trying without it.', vol['name'])
-                    try_again = True
-                else:
-                    vol['error'] = str(e)
-                    failed.append(vol)
-                    continue
-
-            if try_again:
-                # means the cachefile is "stale" or invalid which will prevent
-                # an import so let's try to import without it
-                try:
-                    self.run_call(
-                        'zfs.pool.import_pool', vol['guid'], options, any_host, None, new_name, import_options
-                    )
-                except Exception as e:
-                    vol['error'] = str(e)
-                    failed.append(vol)
-                    continue
-                try:
-                    # make sure the zpool cachefile property is set appropriately
-                    self.run_call(
-                        'zfs.pool.update', vol['name'], {'properties': {'cachefile': {'value': ZPOOL_CACHE_FILE}}}
-                    )
-                except Exception:
-                    logger.warning('Failed to set cachefile property for %r', vol['name'], exc_info=True)
-
-            logger.info('Successfully imported %r', vol['name'])
-
-            # try to unlock the zfs datasets (if any)
-            unlock_job = self.run_call('failover.unlock_zfs_datasets', vol['name'])
-            unlock_job.wait_sync()
-            if unlock_job.error:
-                logger.error(f'Error unlocking ZFS encrypted datasets: {unlock_job.error}')
-            elif unlock_job.result['failed']:
-                logger.error('Failed to unlock %s ZFS encrypted dataset(s)', ','.join(unlock_job.result['failed']))
+        # the pools are independent of one another so import them (and
+        # unlock their datasets) concurrently; total import time becomes
+        # that of the slowest pool instead of the sum of all of them
+        failed = self.run_call('failover.events.import_pools', fobj['volumes'])
 
         # if we fail to import all zpools then alert the user because nothing
         # is going to work at this point
@@ -458,24 +584,29 @@ class FailoverEventsService(Service):
         logger.info('Refreshing failover status')
         self.run_call('failover.status_refresh')
 
-        # this enables all necessary services that have been enabled by the user
-        logger.info('Enabling necessary services')
-        self.run_call('etc.generate', 'rc')
-
-        logger.info('Configuring system dataset')
-        self.run_call('systemdataset.setup')
-
-        # Write the certs to disk based on what is written in db.
-        logger.info('Configuring SSL')
-        self.run_call('etc.generate', 'ssl')
+        # enabling necessary services, configuring the system dataset and
+        # writing the certs to disk (based on what is written in db) are
+        # independent of one another, so overlap them; all must finish
+        # before HTTP is restarted below
+        logger.info('Enabling necessary services, configuring system dataset and SSL')
+        self.run_call('failover.events.run_many', [
+            ['etc.generate_many', [['rc', 'ssl']]],
+            ['systemdataset.setup', []],
+        ])
 
         # Now we restart the appropriate services to ensure it's using correct certs.
         logger.info('Configuring HTTP')
         self.run_call('service.restart', 'http')
 
-        # now we restart the services, prioritizing the "critical" services
+        # now we restart the services, prioritizing the "critical" services;
+        # fetch the service table once and reuse it for both phases
+        services = self.run_call(
+            'datastore.query', 'services_services', [], {'select': ['srv_service', 'srv_enable']}
+        )
         logger.info('Restarting critical services.')
-        self.run_call('failover.events.restart_services', {'critical': True})
+        self.run_call(
+            'failover.events.restart_services_with', services, False, {'critical': True, 'timeout': 15}
+        )
 
         logger.info('Allowing network traffic.')
         fw_accept_job = self.run_call('failover.firewall.accept_all')
@@ -485,13 +616,13 @@ class FailoverEventsService(Service):
 
         logger.info('Critical portion of failover is now complete')
 
-        # regenerate cron
-        logger.info('Regenerating cron')
-        self.run_call('etc.generate', 'cron')
-
-        # sync disks is disabled on passive node
-        logger.info('Syncing disks')
-        self.run_call('disk.sync_all')
+        # regenerate cron (sync disks is disabled on passive node);
+        # the two steps are independent so run them together
+        logger.info('Regenerating cron and syncing disks')
+        self.run_call('failover.events.run_many', [
+            ['etc.generate', ['cron']],
+            ['disk.sync_all', []],
+        ])
 
         # background any methods that can take awhile to
         # run but shouldn't hold up the entire failover
@@ -500,12 +631,17 @@ class FailoverEventsService(Service):
 
         # restart the remaining "non-critical" services
         logger.info('Restarting remaining services')
-        self.run_call('failover.events.restart_services', {'critical': False, 'timeout': 60})
+        k8s_enabled = bool(self.run_call('kubernetes.config')['dataset'])
+        self.run_call(
+            'failover.events.restart_services_with', services, k8s_enabled, {'critical': False, 'timeout': 60}
+        )
 
         # start any VMs (this will log errors if the vm(s) fail to start)
-        self.run_call('vm.start_on_boot')
-
-        self.run_call('truecommand.start_truecommand_service')
+        # and truecommand; neither depends on the other
+        self.run_call('failover.events.run_many', [
+            ['vm.start_on_boot', []],
+            ['truecommand.start_truecommand_service', []],
+        ])
 
         logger.info('Initializing alert system')
         self.run_call('alert.block_failover_alerts')
@@ -567,50 +703,17 @@ class FailoverEventsService(Service):
         logger.warning('Stopping fenced')
         self.run_call('failover.fenced.stop')
 
-        logger.info('Blocking network traffic.')
-        fw_drop_job = self.run_call('failover.firewall.drop_all')
-        fw_drop_job.wait_sync()
-        if fw_drop_job.error:
-            logger.error(f'Error blocking network traffic: {fw_drop_job.error}')
-
-        # restarting keepalived sends a priority 0 advertisement
-        # which means any VIP that is on this controller will be
-        # migrated to the other controller
-        logger.info('Transitioning all VIPs off this node')
-        self.run_call('service.restart', 'keepalived')
-
-        # ticket 23361 enabled a feature to send email alerts when an unclean reboot occurrs.
-        # TrueNAS HA, by design, has a triggered unclean shutdown.
-        # If a controller is demoted to standby, we set a 4 sec countdown using watchdog.
-        # If the zpool(s) can't export within that timeframe, we use watchdog to violently reboot the controller.
-        # When this occurrs, the customer gets an email about an "Unauthorized system reboot".
-        # The idea for creating a new sentinel file for watchdog related panics,
-        # is so that we can send an appropriate email alert.
-        # So if we panic here, middleware will check for this file and send an appropriate email.
-        # ticket 39114
-        with contextlib.suppress(Exception):
-            with open(self.WATCHDOG_ALERT_FILE, 'wb') as f:
-                f.write(int(time.time()).to_bytes(4, sys.byteorder))
-                f.flush()  # be sure it goes straight to disk
-                os.fsync(f.fileno())  # be EXTRA sure it goes straight to disk
+        self.run_call('failover.events.backup_prep')
 
         # setup the zpool cachefile
         self.run_call('failover.zpool.cachefile.setup', 'BACKUP')
 
-        # export zpools in a thread and set a timeout to
-        # to `self.ZPOOL_EXPORT_TIMEOUT`.
+        # export the zpool(s) with a timeout of `self.ZPOOL_EXPORT_TIMEOUT`.
         # if we can't export the zpool(s) in this timeframe,
         # we send the 'b' character to the /proc/sysrq-trigger
         # to trigger an immediate reboot of the system
         # https://www.kernel.org/doc/html/latest/admin-guide/sysrq.html
-        export_thread = threading.Thread(
-            target=self._export_zpools,
-            name='failover_export_zpools',
-            args=(fobj['volumes'], )
-        )
-        export_thread.start()
-        export_thread.join(timeout=self.ZPOOL_EXPORT_TIMEOUT)
-        if export_thread.is_alive():
+        if not self.run_call('failover.events.export_zpools', fobj['volumes']):
             # have to enable the "magic" sysrq triggers
             with open('/proc/sys/kernel/sysrq', 'w') as f:
                 f.write('1')
@@ -664,20 +767,25 @@ class FailoverEventsService(Service):
         return self.FAILOVER_RESULT
 
 
+# interface name: everything before the first underscore, sans leading quote
+_IFNAME_RE = re.compile(r'^"?([^_"]+)')
+
+
 async def vrrp_fifo_hook(middleware, data):
 
     # `data` is a single line separated by whitespace for a total of 4 words.
     # we ignore the 1st word (vrrp instance or group) and the 4th word (priority)
     # since both of them are static in our use case
-    data = data.split()
+    parts = data.split(None, 3)
 
-    ifname = data[1].split('_')[0].strip('"')  # interface
-    event = data[2]  # the state that is being transititoned to
+    event = parts[2]  # the state that is being transititoned to
 
     # we only care about MASTER or BACKUP events currently
     if event not in ('MASTER', 'BACKUP'):
         return
 
+    ifname = _IFNAME_RE.match(parts[1]).group(1)  # interface
+
     middleware.send_event(
         'failover.vrrp_event',
         'CHANGED',
@@ -150,7 +150,7 @@ class RemoteClient(object):
             except Exception:
                 logger.warning('Failed to run callback for %s', name, exc_info=True)
 
-    def sendfile(self, token, local_path, remote_path):
+    def sendfile(self, token, local_path, remote_path, options=None):
         # No reason to honor proxy settings in this
         # method since we're sending across the
         # heartbeat interface which is point-to-point
@@ -162,7 +162,7 @@ class RemoteClient(object):
             files=[
                 ('data', json.dumps({
                     'method': 'filesystem.put',
-                    'params': [remote_path],
+                    'params': [remote_path] + ([options] if options else []),
                 })),
                 ('file', open(local_path, 'rb')),
             ],
@@ -265,8 +265,8 @@ class FailoverService(Service):
             return self.CLIENT.get_remote_os_version()
 
     @private
-    def sendfile(self, token, src, dst):
-        self.CLIENT.sendfile(token, src, dst)
+    def sendfile(self, token, src, dst, options=None):
+        self.CLIENT.sendfile(token, src, dst, options)
 
     @private
     async def ensure_remote_client(self):
@@ -469,6 +469,8 @@ class FilesystemService(Service):
         mode = options.get('mode')
         if mode:
             os.chmod(path, mode)
+        if path == PWENC_FILE_SECRET:
+            await self.middleware.call('pwenc.reset_secret_cache')
         return True
 
     @accepts(Str('path'))
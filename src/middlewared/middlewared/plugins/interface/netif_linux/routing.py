@@ -141,11 +141,20 @@ class RoutingTable:
     def routes(self):
         return self.routes_internal()
 
-    def routes_internal(self, table_filter=None):
+    def routes_internal(self, table_filter=None, interface_filter=None):
         interfaces = self._interfaces()
 
+        kwargs = {"table": table_filter}
+        if interface_filter is not None:
+            # let the kernel filter on the output interface instead of
+            # serializing every route back across the netlink socket
+            oif = interfaces.inv.get(interface_filter)
+            if oif is None:
+                return []
+            kwargs["oif"] = oif
+
         result = []
-        for r in ip.get_routes(table=table_filter):
+        for r in ip.get_routes(**kwargs):
             if r["flags"] & RTM_F_CLONED:
                 continue
 
@@ -201,6 +210,13 @@ class RoutingTable:
     def add(self, route):
         self._op("add", route)
 
+    def add_many(self, routes):
+        # resolve the link table once for the whole batch instead of
+        # dumping it per route
+        interfaces = self._interfaces()
+        for route in routes:
+            self._op("add", route, interfaces)
+
     def change(self, route):
         self._op("set", route)
 
@@ -210,7 +226,7 @@ class RoutingTable:
     def _interfaces(self):
         return bidict.bidict({i["index"]: dict(i["attrs"]).get("IFLA_IFNAME") for i in ip.get_links()})
 
-    def _op(self, op, route):
+    def _op(self, op, route, interfaces=None):
         if route.netmask.version == 4:
             prefixlen = ipaddress.ip_network(f"{route.network}/{route.netmask}").prefixlen
         elif route.netmask.version == 6:
@@ -223,7 +239,11 @@ class RoutingTable:
             lambda v: [v[0], v[1]() if isinstance(v[1], collections.abc.Callable) else v[1]],
             filter(
                 lambda v: v[2] if len(v) == 3 else v[1], (
-                    ("oif", lambda: self._interfaces().inv[route.interface], route.interface is not None),
+                    (
+                        "oif",
+                        lambda: (interfaces if interfaces is not None else self._interfaces()).inv[route.interface],
+                        route.interface is not None,
+                    ),
                     ("table", route.table_id),
                     ("scope", route.scope),
                     ("prefsrc", route.preferred_source),
@@ -1,6 +1,11 @@
+import asyncio
+import contextlib
+import copy
 import ipaddress
-import subprocess
-import time
+import select
+
+from pyroute2 import IPRoute
+from pyroute2.netlink.rtnl import RTMGRP_IPV4_ROUTE, RTMGRP_IPV6_ROUTE
 
 from middlewared.plugins.interface.netif import netif
 from middlewared.service import CallError, ConfigService
@@ -8,6 +13,40 @@ from middlewared.service import CallError, ConfigService
 from .k8s import api_client, service_accounts
 from .utils import KUBEROUTER_RULE_PRIORITY, KUBEROUTER_TABLE_ID, KUBEROUTER_TABLE_NAME
 
+# user route config prefixes and the address factory for each family
+_ROUTE_KEYS = (('route_v4', ipaddress.IPv4Address), ('route_v6', ipaddress.IPv6Address))
+
+# static CNI service-account metadata
+_CNI_CONFIG = {
+    'multus': {'service_account': 'multus'},
+    'kube_router': {'service_account': 'kube-router'},
+}
+
+# kube-router conf skeleton; only the pod subnet differs between calls
+_KUBE_ROUTER_CNF_SKELETON = {
+    'cniVersion': '0.3.0',
+    'name': 'ix-net',
+    'plugins': [
+        {
+            'bridge': 'kube-bridge',
+            'ipam': {
+                'subnet': None,  # filled in from kubernetes.config
+                'type': 'host-local',
+            },
+            'isDefaultGateway': True,
+            'name': 'kubernetes',
+            'type': 'bridge',
+        },
+        {
+            'capabilities': {
+                'portMappings': True,
+                'snat': True,
+            },
+            'type': 'portmap',
+        },
+    ]
+}
+
 
 class KubernetesCNIService(ConfigService):
 
@@ -16,10 +55,7 @@ class KubernetesCNIService(ConfigService):
         namespace = 'k8s.cni'
 
     async def config(self):
-        return {
-            'multus': {'service_account': 'multus'},
-            'kube_router': {'service_account': 'kube-router'},
-        }
+        return _CNI_CONFIG
 
     async def setup_cni(self):
         kube_config = await self.middleware.call('datastore.query', 'services.kubernetes', [], {'get': True})
@@ -53,7 +89,9 @@ class KubernetesCNIService(ConfigService):
             rule_table.add_rule(KUBEROUTER_TABLE_ID, KUBEROUTER_RULE_PRIORITY, kube_config['cluster_cidr'])
 
         await self.middleware.call('service.start', 'kuberouter')
-        await self.middleware.call('k8s.cni.add_user_route_to_kube_router_table')
+        # the datastore row already carries the route_v* fields the helper
+        # needs, so don't make it refetch the config
+        await self.middleware.call('k8s.cni.add_user_route_to_kube_router_table', kube_config)
 
     async def validate_cni_integrity(self, cni, config=None):
         config = config or await self.middleware.call('datastore.query', 'services.kubernetes', [], {'get': True})
@@ -61,75 +99,80 @@ class KubernetesCNIService(ConfigService):
 
     async def kube_router_config(self):
         config = await self.middleware.call('kubernetes.config')
-        return {
-            'cniVersion': '0.3.0',
-            'name': 'ix-net',
-            'plugins': [
-                {
-                    'bridge': 'kube-bridge',
-                    'ipam': {
-                        'subnet': config['cluster_cidr'],
-                        'type': 'host-local',
-                    },
-                    'isDefaultGateway': True,
-                    'name': 'kubernetes',
-                    'type': 'bridge',
-                },
-                {
-                    'capabilities': {
-                        'portMappings': True,
-                        'snat': True,
-                    },
-                    'type': 'portmap',
-                },
-            ]
-        }
+        cnf = copy.deepcopy(_KUBE_ROUTER_CNF_SKELETON)
+        cnf['plugins'][0]['ipam']['subnet'] = config['cluster_cidr']
+        return cnf
 
     def add_routes_to_kube_router_table(self):
         rt = netif.RoutingTable()
         kube_router_table = rt.routing_tables['kube-router']
         cluster_cidr = ipaddress.ip_network(self.middleware.call_sync('kubernetes.config')['cluster_cidr'], False)
 
-        while not any(
-            r.interface == 'kube-bridge' and str(r.network) == str(cluster_cidr.network_address)
-            for r in rt.routes_internal(table_filter=254)
-        ):
-            time.sleep(5)
-
-        for route in filter(lambda r: (r.interface or '') == 'kube-bridge', rt.routes_internal(table_filter=254)):
+        # subscribe to route updates before the first scan so the route can't
+        # land in between, then sleep on the netlink socket and rescan when
+        # the kernel reports a change instead of dumping the table every 5s.
+        # the dump is filtered to kube-bridge kernel-side and the last scan
+        # is reused for the insertion loop below.
+        with IPRoute() as ipr:
+            ipr.bind(groups=RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE)
+            while True:
+                bridge_routes = rt.routes_internal(table_filter=254, interface_filter='kube-bridge')
+                if any(str(r.network) == str(cluster_cidr.network_address) for r in bridge_routes):
+                    break
+                readable, _, _ = select.select([ipr.fileno()], [], [], 5)
+                if readable:
+                    with contextlib.suppress(OSError):
+                        ipr.get()  # drain the notification burst
+
+        # the routes property performs a fresh netlink dump on every access,
+        # so snapshot the table once and test membership against a set
+        # (Route hashes on network/netmask/gateway)
+        existing = set(kube_router_table.routes)
+        new_routes = []
+        for route in bridge_routes:
             route.table_id = kube_router_table.table_id
-            if route in kube_router_table.routes:
+            if route in existing:
                 continue
-            rt.add(route)
+            new_routes.append(route)
+        rt.add_many(new_routes)
 
-    def add_user_route_to_kube_router_table(self):
+    def add_user_route_to_kube_router_table(self, config=None):
         # User route is a default route for kube router table which is going to be
         # used for traffic going outside k8s cluster via pods
-        config = self.middleware.call_sync('kubernetes.config')
-        if all(not config[k] for k in config if k.startswith('route_v')):
+        if config is None:
+            config = self.middleware.call_sync('kubernetes.config')
+        if not any(config.get(f'{k}_gateway') for k, factory in _ROUTE_KEYS):
             return
 
         rt = netif.RoutingTable()
-        kube_router_table = rt.routing_tables[KUBEROUTER_TABLE_NAME]
-        for k in filter(lambda k: config[f'{k}_gateway'] and config[f'{k}_interface'], ('route_v4', 'route_v6')):
-            factory = ipaddress.IPv4Address if k.endswith('v4') else ipaddress.IPv6Address
+        table_id = rt.routing_tables[KUBEROUTER_TABLE_NAME].table_id
+        for k, factory in _ROUTE_KEYS:
+            if not (config.get(f'{k}_gateway') and config.get(f'{k}_interface')):
+                continue
             rt.add(netif.Route(
                 factory(0), factory(0), ipaddress.ip_address(config[f'{k}_gateway']), config[f'{k}_interface'],
-                table_id=kube_router_table.table_id,
+                table_id=table_id,
             ))
 
-    def cleanup_cni(self):
+    async def cleanup_cni(self):
         # We want to remove all CNI related configuration when k8s stops
         # We will clean configuration done by kube-router now
         # Below command will cleanup iptables rules and other ipvs bits changed by kube-router
-        cp = subprocess.Popen(['kube-router', '--cleanup-config'], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
-        stderr = cp.communicate()[1]
+        cp = await asyncio.create_subprocess_exec(
+            'kube-router', '--cleanup-config', stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await cp.communicate()
         if cp.returncode:
             # Let's log the error as to why kube-router was not able to clean up ipvs bits
             # TODO: We should raise an exception but right now this is broken upstream and raising an exception
             #  here means we won't be cleaning/flushing the locally configured routes adding to the issue
             self.logger.error('Failed to cleanup kube-router configuration: %r', stderr.decode())
 
+        # the netlink dumps and route flushes are blocking, keep them off
+        # the event loop
+        await self.middleware.run_in_thread(self._cleanup_cni_network_config)
+
+    def _cleanup_cni_network_config(self):
         rule_table = netif.RuleTable()
         if rule_table.rule_exists(KUBEROUTER_RULE_PRIORITY):
             rule_table.delete_rule(KUBEROUTER_RULE_PRIORITY)
@@ -22,7 +22,6 @@ class NFSService(Service):
         same convenience feature can be added for the LDAP directory
         service.
         """
-        ds = await self.middleware.call('directoryservices.get_state')
         ad_status = DSStatus[ds['activedirectory']]
         ldap_status = DSStatus[ds['ldap']]
 
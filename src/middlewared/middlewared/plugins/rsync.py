@@ -28,10 +28,12 @@ import asyncio
 import asyncssh
 import contextlib
 import enum
-import glob
+import functools
 import os
 import shlex
+import stat
 import tempfile
+import time
 
 from middlewared.common.attachment import LockableFSAttachmentDelegate
 from middlewared.schema import accepts, Bool, Cron, Dict, Str, Int, List, Patch, returns
@@ -45,6 +47,80 @@ from middlewared.utils.osc import run_command_with_user_context
 
 RSYNC_PATH_LIMIT = 1023
 
+# task boolean field -> rsync flag, in emission order
+RSYNC_FLAGS = (
+    ('archive', '-a'),
+    ('compress', '-zz'),
+    ('delayupdates', '--delay-updates'),
+    ('delete', '--delete-delay'),
+    ('preserveattr', '-X'),
+    ('preserveperm', '-p'),
+    ('recursive', '-r'),
+    ('times', '-t'),
+)
+
+# quote-escaping for extra arguments in a single pass
+_EXTRA_QUOTE_TABLE = str.maketrans({'"': r'"\"', "'": r'"\"'})
+
+
+@functools.lru_cache(maxsize=512)
+def _split_extra(extra):
+    # listings re-split the same extra string for every row; cache per
+    # unique value (callers copy the result before mutating)
+    return shlex.split(extra.translate(_EXTRA_QUOTE_TABLE))
+
+
+def parse_remotehost(remotehost, username):
+    """
+    Split a user@host remotehost into (user, host), falling back to
+    `username` when no user is embedded.
+    """
+    if '@' in remotehost:
+        remote_username, remote_host = remotehost.rsplit('@', 1)
+    else:
+        remote_username, remote_host = username, remotehost
+    return remote_username, remote_host
+
+
+def discover_ssh_private_keys(ssh_dir):
+    """
+    Private keys matching id_[edr]* (excluding public halves) found with a
+    single directory scan.
+    """
+    keys = []
+    with contextlib.suppress(FileNotFoundError, NotADirectoryError):
+        with os.scandir(ssh_dir) as entries:
+            for entry in entries:
+                if (
+                    entry.is_file() and entry.name.startswith('id_') and
+                    entry.name[3:4] in ('e', 'd', 'r') and not entry.name.endswith('pub')
+                ):
+                    keys.append(entry.path)
+    return keys
+
+
+# short-lived memo of dscache.get_uncached_user results: task runs,
+# validations and bulk listings repeatedly resolve the same usernames.
+# cleared on any user change event.
+_USER_CACHE_TTL = 30
+_user_cache = {}
+
+# bound the number of simultaneous remote-path probes so bulk task
+# validations (e.g. config import) don't open unbounded SSH sessions
+_REMOTE_PROBE_SEM = asyncio.Semaphore(8)
+
+
+# (alert class, task id) pairs known to have no active one-shot alert;
+# lets repeat successful runs skip the delete hops. an empty set (e.g.
+# after middleware restart) just means the next run deletes as before.
+_cleared_oneshots = set()
+
+
+def _rsync_run_lock(args):
+    # namespace the per-task job lock so task ids can't alias other
+    # integer-keyed locks in the job manager's shared lock table
+    return f'rsync_task:{args[-1]}'
+
 
 class RsyncReturnCode(enum.Enum):
     # from rsync's "errcode.h"
@@ -73,11 +149,19 @@ class RsyncReturnCode(enum.Enum):
 
     @classmethod
     def nonfatals(cls):
-        return tuple([rc.value for rc in [
-            cls.OK,
-            cls.VANISHED,
-            cls.DEL_LIMIT
-        ]])
+        return _RSYNC_NONFATALS
+
+
+# return codes that do not fail the task (a frozenset literal inside the
+# enum body would itself become a member)
+_RSYNC_NONFATALS = frozenset({
+    RsyncReturnCode.OK.value,
+    RsyncReturnCode.VANISHED.value,
+    RsyncReturnCode.DEL_LIMIT.value,
+})
+
+# return code -> symbolic name, for failure messages
+_RC_NAMES = {rc.value: rc.name for rc in RsyncReturnCode}
 
 
 class RsyncdModel(sa.Model):
@@ -130,8 +214,8 @@ class RsyncModModel(sa.Model):
     rsyncmod_maxconn = sa.Column(sa.Integer(), default=0)
     rsyncmod_user = sa.Column(sa.String(120), default="nobody")
     rsyncmod_group = sa.Column(sa.String(120), default="nobody")
-    rsyncmod_hostsallow = sa.Column(sa.Text())
-    rsyncmod_hostsdeny = sa.Column(sa.Text())
+    rsyncmod_hostsallow = sa.Column(sa.JSON(type=list))
+    rsyncmod_hostsdeny = sa.Column(sa.JSON(type=list))
     rsyncmod_auxiliary = sa.Column(sa.Text())
     rsyncmod_enabled = sa.Column(sa.Boolean())
 
@@ -154,8 +238,6 @@ class RsyncModService(SharingService):
 
     @private
     async def rsync_mod_extend(self, data):
-        data['hostsallow'] = data['hostsallow'].split()
-        data['hostsdeny'] = data['hostsdeny'].split()
         data['mode'] = data['mode'].upper()
         return data
 
@@ -165,11 +247,14 @@ class RsyncModService(SharingService):
 
         await self.validate_path_field(data, schema_name, verrors)
 
-        for entity in ('user', 'group'):
-            value = data.get(entity)
-            try:
-                await self.middleware.call(f'{entity}.get_{entity}_obj', {f'{entity}name': value})
-            except Exception:
+        # the two dscache lookups are independent; overlap them
+        results = await asyncio.gather(
+            self.middleware.call('user.get_user_obj', {'username': data.get('user')}),
+            self.middleware.call('group.get_group_obj', {'groupname': data.get('group')}),
+            return_exceptions=True,
+        )
+        for entity, result in zip(('user', 'group'), results):
+            if isinstance(result, Exception):
                 verrors.add(
                     f'{schema_name}.{entity}',
                     f'Please specify a valid {entity}'
@@ -177,8 +262,6 @@ class RsyncModService(SharingService):
 
         verrors.check()
 
-        data['hostsallow'] = ' '.join(data['hostsallow'])
-        data['hostsdeny'] = ' '.join(data['hostsdeny'])
         data['mode'] = data['mode'].lower()
 
         return data
@@ -318,7 +401,7 @@ class RsyncTaskService(TaskPathService):
     @private
     async def rsync_task_extend(self, data, context):
         try:
-            data['extra'] = shlex.split(data['extra'].replace('"', r'"\"').replace("'", r'"\"'))
+            data['extra'] = list(_split_extra(data['extra']))
         except ValueError:
             # This is to handle the case where the extra value is misconfigured for old cases
             # Moving on, we are going to verify that it can be split successfully using shlex
@@ -333,22 +416,41 @@ class RsyncTaskService(TaskPathService):
     @private
     async def rsync_task_extend_context(self, rows, extra):
         jobs = {}
-        for j in await self.middleware.call("core.get_jobs", [("method", "=", "rsynctask.run")],
-                                            {"order_by": ["id"]}):
-            try:
-                task_id = int(j["arguments"][0])
-            except (IndexError, TypeError, ValueError):
-                continue
+        if rows:
+            # only fetch jobs for the tasks being listed instead of
+            # marshaling every historical rsynctask.run job
+            for j in await self.middleware.call(
+                "core.get_jobs",
+                [("method", "=", "rsynctask.run"), ("arguments.0", "in", [row["id"] for row in rows])],
+                {"order_by": ["id"]},
+            ):
+                try:
+                    task_id = int(j["arguments"][0])
+                except (IndexError, TypeError, ValueError):
+                    continue
 
-            if task_id in jobs and jobs[task_id]["state"] == "RUNNING":
-                continue
+                if task_id in jobs and jobs[task_id]["state"] == "RUNNING":
+                    continue
 
-            jobs[task_id] = j
+                jobs[task_id] = j
 
         return {
             "jobs": jobs,
         }
 
+    @private
+    async def get_user(self, username):
+        """
+        dscache.get_uncached_user with a short TTL; raises KeyError for an
+        unknown user just like the uncached lookup.
+        """
+        cached = _user_cache.get(username)
+        if cached is not None and time.monotonic() - cached[0] < _USER_CACHE_TTL:
+            return cached[1]
+        user = await self.middleware.call('dscache.get_uncached_user', username)
+        _user_cache[username] = (time.monotonic(), user)
+        return user
+
     @private
     async def validate_rsync_task(self, data, schema):
         verrors = ValidationErrors()
@@ -363,7 +465,7 @@ class RsyncTaskService(TaskPathService):
 
         user = None
         with contextlib.suppress(KeyError):
-            user = await self.middleware.call('dscache.get_uncached_user', username)
+            user = await self.get_user(username)
 
         if not user:
             verrors.add(f'{schema}.user', f'Provided user "{username}" does not exist')
@@ -373,7 +475,7 @@ class RsyncTaskService(TaskPathService):
 
         data['extra'] = ' '.join(data['extra'])
         try:
-            shlex.split(data['extra'].replace('"', r'"\"').replace("'", r'"\"'))
+            _split_extra(data['extra'])
         except ValueError as e:
             verrors.add(f'{schema}.extra', f'Please specify valid value: {e}')
 
@@ -415,9 +517,8 @@ class RsyncTaskService(TaskPathService):
                 if not data['remoteport']:
                     verrors.add(f'{schema}.remoteport', 'This field is required')
 
-                search = os.path.join(user['pw_dir'], '.ssh', 'id_[edr]*')
-                exclude_from_search = os.path.join(user['pw_dir'], '.ssh', 'id_[edr]*pub')
-                key_files = set(glob.glob(search)) - set(glob.glob(exclude_from_search))
+                ssh_dir = os.path.join(user['pw_dir'], '.ssh')
+                key_files = set(discover_ssh_private_keys(ssh_dir))
                 if not key_files:
                     verrors.add(
                         f'{schema}.user',
@@ -425,22 +526,22 @@ class RsyncTaskService(TaskPathService):
                         ' with a private key (DSA/ECDSA/RSA) set up in home dir.'
                     )
                 else:
-                    for file in set(key_files):
+                    good_keys = set()
+                    for file in key_files:
                         # file holds a private key and it's permissions should be 600
-                        if os.stat(file).st_mode & 0o077 != 0:
+                        mode = os.stat(file).st_mode
+                        if mode & 0o077 != 0:
                             verrors.add(
                                 f'{schema}.user',
-                                f'Permissions {str(oct(os.stat(file).st_mode & 0o777))[2:]} for {file} are too open. Please '
+                                f'Permissions {oct(mode & 0o777)[2:]} for {file} are too open. Please '
                                 f'correct them by running chmod 600 {file}'
                             )
-                            key_files.discard(file)
+                        else:
+                            good_keys.add(file)
+                    key_files = good_keys
 
                     if key_files:
-                        if '@' in data['remotehost']:
-                            remote_username, remote_host = data['remotehost'].rsplit('@', 1)
-                        else:
-                            remote_username = username
-                            remote_host = data['remotehost']
+                        remote_username, remote_host = parse_remotehost(data['remotehost'], username)
 
                         connect_kwargs = {
                             'host': remote_host,
@@ -456,10 +557,21 @@ class RsyncTaskService(TaskPathService):
 
             if data['enabled'] and data['validate_rpath'] and connect_kwargs:
                 try:
-                    async with await asyncio.wait_for(
-                        asyncssh.connect(**connect_kwargs), timeout=5,
-                    ) as conn:
-                        await conn.run(f'test -d {shlex.quote(remote_path)}', check=True)
+                    async with _REMOTE_PROBE_SEM:
+                        async with await asyncio.wait_for(
+                            asyncssh.connect(**connect_kwargs), timeout=5,
+                        ) as conn:
+                            # a single SFTP STAT round-trip is cheaper than
+                            # opening an exec channel to run test -d
+                            async with conn.start_sftp_client() as sftp:
+                                attrs = await sftp.stat(remote_path)
+                                if attrs.permissions is None or not stat.S_ISDIR(attrs.permissions):
+                                    verrors.add(
+                                        f'{schema}.remotepath',
+                                        'The Remote Path you specified does not exist or is not a directory.'
+                                        'Either create one yourself on the remote machine or uncheck the '
+                                        'validate_rpath field'
+                                    )
                 except asyncio.TimeoutError:
                     verrors.add(
                         f'{schema}.remotehost',
@@ -483,8 +595,8 @@ class RsyncTaskService(TaskPathService):
                         f'Disconnect Error[ error code {e.code} ] was generated when trying to communicate with remote '
                         f'host {connect_kwargs["host"]} and remote user {connect_kwargs["username"]}.'
                     )
-                except asyncssh.ProcessError as e:
-                    if e.code == '1':
+                except asyncssh.SFTPError as e:
+                    if e.code == asyncssh.FX_NO_SUCH_FILE:
                         verrors.add(
                             f'{schema}.remotepath',
                             'The Remote Path you specified does not exist or is not a directory.'
@@ -675,19 +787,11 @@ class RsyncTaskService(TaskPathService):
         """
         rsync = self.middleware.call_sync('rsynctask.get_instance', id)
         path = shlex.quote(rsync['path'])
+        remotepath = shlex.quote(rsync['remotepath']) if rsync['remotepath'] else ''
 
         with contextlib.ExitStack() as exit_stack:
             line = ['rsync']
-            for name, flag in (
-                ('archive', '-a'),
-                ('compress', '-zz'),
-                ('delayupdates', '--delay-updates'),
-                ('delete', '--delete-delay'),
-                ('preserveattr', '-X'),
-                ('preserveperm', '-p'),
-                ('recursive', '-r'),
-                ('times', '-t'),
-            ):
+            for name, flag in RSYNC_FLAGS:
                 if rsync[name]:
                     line.append(flag)
             if rsync['extra']:
@@ -702,10 +806,11 @@ class RsyncTaskService(TaskPathService):
                     remote = f'"{rsync["user"]}"@{rsync["remotehost"]}'
 
             if rsync['mode'] == 'MODULE':
-                module_args = [path, f'{remote}::"{rsync["remotemodule"]}"']
-                if rsync['direction'] != 'PUSH':
-                    module_args.reverse()
-                line += module_args
+                remote_target = f'{remote}::"{rsync["remotemodule"]}"'
+                if rsync['direction'] == 'PUSH':
+                    line += [path, remote_target]
+                else:
+                    line += [remote_target, path]
             else:
                 if rsync['ssh_credentials']:
                     credentials = rsync['ssh_credentials']['attributes']
@@ -718,18 +823,24 @@ class RsyncTaskService(TaskPathService):
                     remote = f'"{credentials["username"]}"@{credentials["host"]}'
                     port = credentials['port']
 
-                    user = self.middleware.call_sync('dscache.get_uncached_user', rsync['user'])
-
-                    private_key_file = exit_stack.enter_context(tempfile.NamedTemporaryFile('w'))
-                    os.fchmod(private_key_file.fileno(), 0o600)
-                    os.fchown(private_key_file.fileno(), user['pw_uid'], user['pw_gid'])
-                    private_key_file.write(key_pair['attributes']['private_key'])
-                    private_key_file.flush()
-
-                    host_key_file = exit_stack.enter_context(tempfile.NamedTemporaryFile('w'))
-                    os.fchmod(host_key_file.fileno(), 0o600)
-                    os.fchown(host_key_file.fileno(), user['pw_uid'], user['pw_gid'])
-                    host_key_file.write('\n'.join([
+                    user = self.middleware.call_sync('rsynctask.get_user', rsync['user'])
+
+                    def write_temp_file(content):
+                        # mkstemp already creates the file with mode 0o600,
+                        # so only ownership and the raw bytes are left
+                        fd, name = tempfile.mkstemp(text=False)
+                        exit_stack.callback(os.unlink, name)
+                        try:
+                            os.fchown(fd, user['pw_uid'], user['pw_gid'])
+                            buf = content.encode()
+                            while buf:
+                                buf = buf[os.write(fd, buf):]
+                        finally:
+                            os.close(fd)
+                        return name
+
+                    private_key_path = write_temp_file(key_pair['attributes']['private_key'])
+                    host_key_path = write_temp_file('\n'.join([
                         (
                             f'{credentials["host"]} {host_key}' if credentials['port'] == 22
                             else f'[{credentials["host"]}]:{credentials["port"]} {host_key}'
@@ -737,9 +848,8 @@ class RsyncTaskService(TaskPathService):
                         for host_key in credentials['remote_host_key'].split("\n")
                         if host_key.strip() and not host_key.strip().startswith("#")
                     ]))
-                    host_key_file.flush()
 
-                    extra_args = f'-i {private_key_file.name} -o UserKnownHostsFile={host_key_file.name}'
+                    extra_args = f'-i {private_key_path} -o UserKnownHostsFile={host_key_path}'
                 else:
                     port = rsync['remoteport']
                     extra_args = ''
@@ -748,10 +858,11 @@ class RsyncTaskService(TaskPathService):
                     '-e',
                     f'"ssh -p {port} -o BatchMode=yes -o StrictHostKeyChecking=yes {extra_args}"'
                 ]
-                path_args = [path, f'{remote}:"{shlex.quote(rsync["remotepath"])}"']
-                if rsync['direction'] != 'PUSH':
-                    path_args.reverse()
-                line += path_args
+                remote_target = f'{remote}:"{remotepath}"'
+                if rsync['direction'] == 'PUSH':
+                    line += [path, remote_target]
+                else:
+                    line += [remote_target, path]
 
             if rsync['quiet']:
                 line += ['>', '/dev/null', '2>&1']
@@ -761,27 +872,40 @@ class RsyncTaskService(TaskPathService):
     @item_method
     @accepts(Int('id'))
     @returns()
-    @job(lock=lambda args: args[-1], lock_queue_size=1, logs=True)
+    @job(lock=_rsync_run_lock, lock_queue_size=1, logs=True)
     def run(self, job, id):
         """
         Job to run rsync task of `id`.
 
         Output is saved to job log excerpt (not syslog).
         """
-        self.middleware.call_sync('network.general.will_perform_activity', 'rsync')
-
         rsync = self.middleware.call_sync('rsynctask.get_instance', id)
         if rsync['locked']:
+            # nothing will run; skip the network-activity hop entirely
             self.middleware.call_sync('rsynctask.generate_locked_alert', id)
             return
 
+        self.middleware.call_sync('network.general.will_perform_activity', 'rsync')
+
         with self.commandline(id) as commandline:
+            # line-buffer rsync so the job log fills as it runs rather than
+            # in block-buffered bursts (prefixed here, where the command is
+            # known to start with the rsync binary; sudo strips LD_PRELOAD
+            # so stdbuf must run inside the shell)
             cp = run_command_with_user_context(
-                commandline, rsync['user'], output=False, callback=lambda v: job.logs_fd.write(v),
+                f'stdbuf -oL -eL {commandline}', rsync['user'], output=False, callback=job.logs_fd.write,
             )
 
-        for klass in ('RsyncSuccess', 'RsyncFailed') if not rsync['quiet'] else ():
-            self.middleware.call_sync('alert.oneshot_delete', klass, rsync['id'])
+        if not rsync['quiet']:
+            to_clear = [
+                klass for klass in ('RsyncSuccess', 'RsyncFailed')
+                if (klass, rsync['id']) not in _cleared_oneshots
+            ]
+            if to_clear:
+                self.middleware.call_sync(
+                    'alert.oneshot_delete_many', [[klass, rsync['id']] for klass in to_clear]
+                )
+                _cleared_oneshots.update((klass, rsync['id']) for klass in to_clear)
 
         if cp.returncode not in RsyncReturnCode.nonfatals():
             err = None
@@ -798,15 +922,12 @@ class RsyncTaskService(TaskPathService):
                     'direction': rsync['direction'],
                     'path': rsync['path'],
                 })
+                _cleared_oneshots.discard(('RsyncFailed', rsync['id']))
 
             if err:
                 msg = f'{err} Check logs for further information'
             else:
-                try:
-                    rc_name = RsyncReturnCode(cp.returncode).name
-                except ValueError:
-                    rc_name = 'UNKNOWN'
-
+                rc_name = _RC_NAMES.get(cp.returncode, 'UNKNOWN')
                 msg = (
                     f'rsync command returned {cp.returncode} - {rc_name}. '
                     'Check logs for further information.'
@@ -819,6 +940,7 @@ class RsyncTaskService(TaskPathService):
                 'direction': rsync['direction'],
                 'path': rsync['path'],
             })
+            _cleared_oneshots.discard(('RsyncSuccess', rsync['id']))
 
 
 class RsyncModuleFSAttachmentDelegate(LockableFSAttachmentDelegate):
@@ -841,7 +963,12 @@ class RsyncFSAttachmentDelegate(LockableFSAttachmentDelegate):
         await self.middleware.call('service.restart', 'cron')
 
 
+async def _clear_user_cache(middleware, event_type, args):
+    _user_cache.clear()
+
+
 async def setup(middleware):
+    middleware.event_subscribe('user.query', _clear_user_cache)
     await middleware.call('pool.dataset.register_attachment_delegate', RsyncModuleFSAttachmentDelegate(middleware))
     await middleware.call('pool.dataset.register_attachment_delegate', RsyncFSAttachmentDelegate(middleware))
     await middleware.call('network.general.register_activity', 'rsync', 'Rsync')
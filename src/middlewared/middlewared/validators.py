@@ -92,7 +92,9 @@ class Match:
             raise ValueError(self.explanation or f"Value does not match {self.pattern!r} pattern")
 
     def __deepcopy__(self, memo):
-        return Match(self.pattern, self.flags, self.explanation)
+        # validators are immutable; schema deepcopies (Patch/Ref resolution)
+        # can share the instance instead of recompiling the pattern
+        return self
 
 
 class Hostname(Match):
@@ -11,23 +11,33 @@ from pytest_dependency import depends
 apifolder = os.getcwd()
 sys.path.append(apifolder)
 from functions import GET, PUT, POST, DELETE, wait_on_job
-from auto_config import ha, dev_test, interface, ip, pool_name
+from auto_config import ha, interface, ip, pool_name
 
 container_reason = "Can't import docker_username and docker_password"
-try:
-    from config import (
-        docker_username,
-        docker_password,
-        docker_image,
-        docker_tag
-    )
-    skip_container_image = pytest.mark.skipif(False, reason=container_reason)
-except ImportError:
-    skip_container_image = pytest.mark.skipif(True, reason=container_reason)
-
-reason = 'Skipping for test development testing'
-# comment pytestmark for development testing with --dev-test
-pytestmark = pytest.mark.skipif(dev_test, reason=reason)
+
+
+@pytest.fixture(scope='session')
+def docker_creds():
+    # import lazily so collection doesn't pay for (or fail on) a missing
+    # config.py; the result is cached for the whole session
+    try:
+        from config import (
+            docker_username,
+            docker_password,
+            docker_image,
+            docker_tag
+        )
+    except ImportError:
+        pytest.skip(container_reason)
+    return {
+        'username': docker_username,
+        'password': docker_password,
+        'image': docker_image,
+        'tag': docker_tag,
+    }
+
+from skip_marks import SKIP_DEV_TEST
+pytestmark = SKIP_DEV_TEST
 
 # Read all the test below only on non-HA
 if not ha:
@@ -103,17 +113,16 @@ if not ha:
         assert results.status_code == 200, results.text
         assert isinstance(results.json(), list), results.text
 
-    @skip_container_image
     @pytest.mark.dependency(name='pull_private_image')
-    def test_05_pull_a_private_container_image(request):
+    def test_05_pull_a_private_container_image(request, docker_creds):
         depends(request, ['setup_kubernetes'], scope='session')
         payload = {
             'docker_authentication': {
-                'username': docker_username,
-                'password': docker_password
+                'username': docker_creds['username'],
+                'password': docker_creds['password']
             },
-            'from_image': docker_image,
-            'tag': docker_tag
+            'from_image': docker_creds['image'],
+            'tag': docker_creds['tag']
         }
         results = POST('/container/image/pull/', payload)
         assert results.status_code == 200, results.text
@@ -121,17 +130,15 @@ if not ha:
         job_status = wait_on_job(job_id, 180)
         assert job_status['state'] == 'SUCCESS', str(job_status['results'])
 
-    def test_06_get_new_private_image_id(request):
+    def test_06_get_new_private_image_id(request, docker_creds):
         depends(request, ['pull_private_image'])
         global private_image_id
-        results = GET('/container/image/')
-        for result in results.json():
-            if result['repo_tags'] == [f'{docker_image}:{docker_tag}']:
-                private_image_id = result['id']
-                assert True, result
-                break
-        else:
-            assert False, results
+        # filter server-side instead of fetching and scanning every image
+        results = call(
+            'container.image.query', [['repo_tags', '=', [f'{docker_creds["image"]}:{docker_creds["tag"]}']]]
+        )
+        assert results, results
+        private_image_id = results[0]['id']
 
     def test_07_get_private_image_with_id(request):
         depends(request, ['pull_private_image'])
@@ -170,14 +177,10 @@ if not ha:
     def test_11_get_new_public_image_id(request):
         depends(request, ['pull_public_image'])
         global public_image_id
-        results = GET('/container/image/')
-        for result in results.json():
-            if result['repo_tags'] == ['minio/minio:latest']:
-                public_image_id = result['id']
-                assert True, result
-                break
-        else:
-            assert False, results
+        # filter server-side instead of fetching and scanning every image
+        results = call('container.image.query', [['repo_tags', '=', ['minio/minio:latest']]])
+        assert results, results
+        public_image_id = results[0]['id']
 
     def test_12_get_public_image_with_id(request):
         depends(request, ['pull_public_image'])
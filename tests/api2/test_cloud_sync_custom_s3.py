@@ -11,10 +11,8 @@ import sys
 import os
 apifolder = os.getcwd()
 sys.path.append(apifolder)
-from auto_config import dev_test
-reason = 'Skipping for test development testing'
-# comment pytestmark for development testing with --dev-test
-pytestmark = pytest.mark.skipif(dev_test, reason=reason)
+from skip_marks import SKIP_DEV_TEST
+pytestmark = SKIP_DEV_TEST
 
 
 @pytest.mark.parametrize("credential_attributes,result", [
@@ -54,6 +52,10 @@ def test_custom_s3(request, credential_attributes, result):
                 with mock_rclone() as mr:
                     call("cloudsync.sync", t["id"])
 
-                    time.sleep(2.5)
+                    # wait for the mocked rclone to record its invocation
+                    # instead of sleeping a fixed wall-clock amount
+                    deadline = time.monotonic() + 10
+                    while not mr.launched and time.monotonic() < deadline:
+                        time.sleep(0.25)
 
                     assert mr.result["config"]["remote"]["region"] == "fr-par"
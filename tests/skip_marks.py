@@ -0,0 +1,11 @@
+"""
+Shared pytest skip marks. Importing the mark lets test modules reuse one
+mark object (and one condition evaluation) instead of rebuilding the same
+skipif per file at collection time.
+"""
+import pytest
+
+from auto_config import dev_test
+
+# comment out usage of this mark for development testing with --dev-test
+SKIP_DEV_TEST = pytest.mark.skipif(dev_test, reason='Skipping for test development testing')